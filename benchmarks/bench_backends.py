@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+bench_backends.py  – compare embedding backends against the fp32 reference
+────────────────────────────────────────────────────────────────────────────
+Each backend runs in its own interpreter (so peak RSS is not shared) over the
+same fixed corpus, with the embedding cache bypassed.  The corpus should be a
+full saved day (default: the newest .cache/arxiv/<date>.jsonl); published
+digests hold only the picks, where top-k overlap is trivially 1.0, so corpora
+under MIN_PAPERS_PER_K * k papers are refused.  Reported per backend:
+
+  load_s / encode_s / ms_per_paper   model load and encode latency
+  peak_rss_mb                        ru_maxrss of the worker process
+  top{k}_overlap                     |top-k ∩ top-k(torch)| / k
+  spearman                           rank correlation of scores vs torch
+
+    python benchmarks/bench_backends.py [--k 5] [--backends torch onnx-int8] [FILES…]
+"""
+from __future__ import annotations
+
+import argparse, json, resource, subprocess, sys, time
+import pathlib
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+from corpus import ROOT, load_corpus
+
+REFERENCE = "torch"
+MIN_PAPERS_PER_K = 10
+
+
+def worker(backend: str, corpus: List[pathlib.Path], batch_size: int) -> Dict:
+    sys.path.insert(0, str(ROOT))
+    import mt_arxiv_digest as m
+
+    papers = load_corpus(corpus)
+    m.EMBED_BACKEND = backend
+    t0 = time.perf_counter()
+    m.get_embedder()
+    m.get_concept_vector()
+    t1 = time.perf_counter()
+    matrix = m.encode_papers(papers, batch_size)
+    t2 = time.perf_counter()
+    return {
+        "backend": backend,
+        "load_s": t1 - t0,
+        "encode_s": t2 - t1,
+        "ms_per_paper": 1000 * (t2 - t1) / max(1, len(papers)),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "scores": m.score_matrix(matrix).tolist(),
+    }
+
+
+def spearman(a: np.ndarray, b: np.ndarray) -> float:
+    if len(a) < 2:
+        return 1.0
+    ra = np.argsort(np.argsort(a)).astype(float)
+    rb = np.argsort(np.argsort(b)).astype(float)
+    return float(np.corrcoef(ra, rb)[0, 1])
+
+
+def top_overlap(a: np.ndarray, b: np.ndarray, k: int) -> float:
+    k = min(k, len(a))
+    if k == 0:
+        return 1.0
+    return len(set(np.argsort(-a)[:k]) & set(np.argsort(-b)[:k])) / k
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark embedding backends.")
+    ap.add_argument("corpus", nargs="*", type=pathlib.Path,
+                    help="JSONL / digest markdown files (default: newest saved arXiv day).")
+    ap.add_argument("--backends", nargs="+", default=["torch", "onnx-int8"])
+    ap.add_argument("--k", type=int, default=5, help="Top-k for overlap (default: %(default)s).")
+    ap.add_argument("--batch-size", type=int, default=32)
+    ap.add_argument("--worker", help=argparse.SUPPRESS)
+    ns = ap.parse_args()
+
+    if ns.worker:
+        print(json.dumps(worker(ns.worker, ns.corpus, ns.batch_size)))
+        return
+
+    if not ns.corpus:
+        ns.corpus = sorted((ROOT / ".cache" / "arxiv").glob("*.jsonl"))[-1:]
+        if not ns.corpus:
+            raise SystemExit("No saved arXiv day – run the digest once or pass a "
+                             ".cache/arxiv/<date>.jsonl file")
+    n = len(load_corpus(ns.corpus))
+    if n < MIN_PAPERS_PER_K * ns.k:
+        raise SystemExit(f"Corpus has {n} papers; top-{ns.k} overlap needs at least "
+                         f"{MIN_PAPERS_PER_K * ns.k} to mean anything – pass a full day")
+    backends = [REFERENCE] + [b for b in ns.backends if b != REFERENCE]
+    results = {}
+    for b in backends:
+        cmd = [sys.executable, __file__, "--worker", b, "--batch-size", str(ns.batch_size),
+               *map(str, ns.corpus)]
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+        results[b] = json.loads(out.strip().splitlines()[-1])
+
+    ref = np.array(results[REFERENCE]["scores"])
+    print(f"corpus: {n} papers\n")
+    print(f"{'backend':<10} {'load_s':>7} {'encode_s':>9} {'ms/paper':>9} "
+          f"{'rss_MB':>8} {f'top{ns.k}':>6} {'spearman':>9}")
+    for b, r in results.items():
+        s = np.array(r["scores"])
+        print(f"{b:<10} {r['load_s']:7.2f} {r['encode_s']:9.2f} {r['ms_per_paper']:9.1f} "
+              f"{r['peak_rss_mb']:8.0f} {top_overlap(ref, s, ns.k):6.2f} {spearman(ref, s):9.4f}")
+
+
+if __name__ == "__main__":
+    main()
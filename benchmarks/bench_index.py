@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+bench_index.py  – latency of the historical paper index
+────────────────────────────────────────────────────────────────────────────
+Fills a throw-away PaperIndex with synthetic clustered unit vectors (topic
+centres + noise, roughly how paper embeddings spread), marks --picks of them
+as sent (5 a day, like the digest) and times what the digest actually runs:
+
+  * opening the index (parsing meta.json)
+  * `duplicates()` for the head of one day's ranking (--head candidates);
+    the first lookup of a day reads that day's past picks from disk
+  * `related()` for one pick, later in the same day
+
+Then, for ad-hoc whole-index search, unrestricted `search()` exact vs after
+`train()` (IVF), plus IVF recall@k against the exact answer.
+
+    python benchmarks/bench_index.py [--rows 100000] [--picks 1800] [--dim 1024]
+"""
+from __future__ import annotations
+
+import argparse, datetime as dt, pathlib, statistics, sys, tempfile, time
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from vector_index import DEFAULT_NPROBE, PaperIndex
+
+PICKS_PER_DAY = 5
+
+
+def synthetic(rows: int, dim: int, topics: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((topics, dim)).astype(np.float32)
+    x = centres[rng.integers(0, topics, rows)] + 0.6 * rng.standard_normal((rows, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def timed(fn, args) -> list:
+    lat = []
+    for a in args:
+        t = time.perf_counter()
+        fn(a)
+        lat.append(1000 * (time.perf_counter() - t))
+    return lat
+
+
+def report(label: str, lat: list) -> None:
+    p95 = sorted(lat)[int(0.95 * (len(lat) - 1))]
+    print(f"{label:<22} median {statistics.median(lat):7.2f} ms  p95 {p95:7.2f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark PaperIndex lookups.")
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--picks", type=int, default=1_800, help="Past picks (5 per day).")
+    ap.add_argument("--dim", type=int, default=1024)
+    ap.add_argument("--topics", type=int, default=500)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--head", type=int, default=10,
+                    help="Candidates checked per duplicates() call (default: %(default)s).")
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--nprobe", type=int, default=DEFAULT_NPROBE)
+    ns = ap.parse_args()
+    if not 0 < ns.picks <= ns.rows:
+        ap.error("--picks must be between 1 and --rows")
+
+    vecs = synthetic(ns.rows + ns.queries * ns.head, ns.dim, ns.topics)
+    data, fresh = vecs[:ns.rows], vecs[ns.rows:]
+    papers = [{"id": f"9999.{i:06d}", "title": "", "url": ""} for i in range(ns.rows)]
+    rng = np.random.default_rng(1)
+    picked = rng.choice(ns.rows, ns.picks, replace=False)
+    start = dt.date(2000, 1, 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = PaperIndex(pathlib.Path(tmp), "bench", nprobe=ns.nprobe)
+        index.add(papers, data, start.isoformat())
+        for day in range(0, ns.picks, PICKS_PER_DAY):
+            date = (start + dt.timedelta(days=day // PICKS_PER_DAY)).isoformat()
+            index.record_picks([papers[r]["id"] for r in picked[day:day + PICKS_PER_DAY]], date)
+        index.save()
+        today = (start + dt.timedelta(days=ns.picks // PICKS_PER_DAY + 1)).isoformat()
+        print(f"{ns.rows} rows, {ns.picks} picks, dim {ns.dim}")
+
+        report("open", timed(lambda _: PaperIndex(pathlib.Path(tmp), "bench"), range(5)))
+        index = PaperIndex(pathlib.Path(tmp), "bench", nprobe=ns.nprobe)
+        day_papers = [{"id": f"8888.{i:06d}"} for i in range(ns.head)]
+        later = [(dt.date.fromisoformat(today) + dt.timedelta(days=q)).isoformat()
+                 for q in range(ns.queries)]               # a new day each: cold picks
+        report(f"duplicates ({ns.head} cand.)",
+               timed(lambda q: index.duplicates(day_papers, fresh[q * ns.head:(q + 1) * ns.head],
+                                                later[q]), range(ns.queries)))
+        report("related (1 pick)",
+               timed(lambda r: index.related(papers[r]["id"], today),
+                     picked[:ns.queries]))
+
+        print("\nad-hoc whole-index search (not used by the digest):")
+        queries = fresh[:ns.queries]
+        answers = {}
+        for label in ("exact", "ivf"):
+            if label == "ivf":
+                t = time.perf_counter()
+                index.train()
+                print(f"{'train':<22} {time.perf_counter() - t:7.2f} s")
+            answers[label] = []
+            report(f"search {label}", timed(
+                lambda q: answers[label].append([r for _, r in index.search(q, ns.k)[0]]),
+                queries))
+
+    recall = np.mean([len(set(a) & set(b)) / ns.k
+                      for a, b in zip(answers["exact"], answers["ivf"])])
+    print(f"ivf recall@{ns.k} vs exact: {recall:.3f}  (nprobe {ns.nprobe})")
+
+
+if __name__ == "__main__":
+    main()
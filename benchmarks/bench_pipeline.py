@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+bench_pipeline.py  – end-to-end digest benchmark on synthetic days
+────────────────────────────────────────────────────────────────────────────
+Runs `process_day` for synthetic 100 / 1k / 10k-paper days against local
+stand-ins, with all caches, logs and digests in a temp directory:
+
+  arXiv   `_stream_arxiv` replaced by a generator of synthetic papers
+  OpenAI  `openai_chat` replaced by a canned reply with fixed token usage
+  model   the real EMBED_BACKEND by default; `--encoder hash` swaps in a
+          deterministic hashing encoder so only the non-model hot path
+          (scoring, top-k, prefilter, caches, index) is timed
+
+Each size runs twice: cold (empty caches) and warm (same day again, so the
+embedding and arXiv caches hit).  Per-stage wall time comes from the same
+StageTimer figures the real run logs.
+
+    python benchmarks/bench_pipeline.py [--sizes 100 1000 10000] [--encoder hash]
+"""
+from __future__ import annotations
+
+import argparse, datetime as dt, pathlib, random, sys, tempfile, zlib
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+import mt_arxiv_digest as m
+
+WORDS = ("model language data task learning training evaluation benchmark reasoning "
+         "dataset llm agent retrieval speech dialogue parsing summarization token "
+         "attention multilingual alignment knowledge generation").split()
+MT_WORDS = "translation nmt bleu comet mqm post-editing bilingual wmt low-resource".split()
+DIM = 1024
+
+
+class HashEncoder:
+    """Stand-in encoder: bag of hashed words → fixed random projection."""
+
+    def __init__(self, dim: int = DIM):
+        self.proj = np.random.default_rng(0).standard_normal((4096, dim)).astype(np.float32)
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False, convert_to_numpy=True):
+        single = isinstance(texts, str)
+        texts = [texts] if single else texts
+        bags = np.zeros((len(texts), 4096), dtype=np.float32)
+        for i, t in enumerate(texts):
+            for w in t.lower().split():
+                bags[i, zlib.crc32(w.encode()) % 4096] += 1
+        vecs = bags @ self.proj
+        if normalize_embeddings:
+            vecs /= np.linalg.norm(vecs, axis=1, keepdims=True).clip(min=1e-12)
+        return vecs[0] if single else vecs
+
+
+def synthetic_day(n: int, seed: int):
+    rng = random.Random(seed)
+    for i in range(n):
+        vocab = WORDS + MT_WORDS if rng.random() < 0.1 else WORDS
+        yield {
+            "id": f"{seed:04d}.{i:05d}v1",
+            "title": " ".join(rng.choices(vocab, k=8)).capitalize(),
+            "abstract": " ".join(rng.choices(vocab, k=rng.randint(80, 250))),
+            "url": f"http://arxiv.org/pdf/{seed:04d}.{i:05d}v1",
+        }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the digest pipeline on synthetic days.")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    ap.add_argument("--encoder", choices=("model", "hash"), default="model")
+    ap.add_argument("--prefilter", type=int, default=0)
+    ap.add_argument("--batch-size", type=int, default=m.DEFAULT_BATCH_SIZE)
+    ns_cli = ap.parse_args()
+
+    current = {"n": 0, "seed": 0}
+    m._stream_arxiv = lambda date, page_size: synthetic_day(current["n"], current["seed"])
+    m.openai_chat = lambda model, messages, temperature=0, cache=None: (
+        "Benchmark preface.", {"prompt_tokens": 200, "completion_tokens": 60, "total_tokens": 260},
+        False)
+    if ns_cli.encoder == "hash":
+        m._EMBEDDER = HashEncoder()
+
+    ns = argparse.Namespace(max_picks=m.DEFAULT_MAX_PICKS, batch_size=ns_cli.batch_size,
+                            prefilter=ns_cli.prefilter, offline=False, refresh=False,
+                            page_size=m.PAGE_SIZE)
+    stages = ("fetch_cscl", "model_init", "rank_mt_papers", "draft_preface", "write_md")
+    print(f"{'papers':>7} {'pass':>5} " + " ".join(f"{s:>15}" for s in stages) + "   (wall s)")
+    with tempfile.TemporaryDirectory() as tmp, ThreadPoolExecutor(max_workers=1) as pool:
+        tmp = pathlib.Path(tmp)
+        m.BASE_DIR, m.LOG_DIR = tmp, tmp / "logs"
+        m.CACHE_DIR, m.ARXIV_CACHE_DIR = tmp / "embeddings", tmp / "arxiv"
+        m.LOG_DIR.mkdir()
+        store = m.EmbeddingStore(m.CACHE_DIR, m.embed_namespace())
+        index = m.PaperIndex(tmp / "index", m.embed_namespace())
+        for seed, n in enumerate(ns_cli.sizes, start=1):
+            current.update(n=n, seed=seed)
+            day = dt.date(2000, 1, 1) + dt.timedelta(days=seed)
+            for label in ("cold", "warm"):
+                with m.measure() as fetch_stats:
+                    papers = m.fetch_day(day, ns)
+                figures = m.process_day(day, papers, ns, store, index, None, pool, fetch_stats)
+                cells = " ".join(f"{figures[s]['wall_s']:15.3f}" if s in figures else f"{'-':>15}"
+                                 for s in stages)
+                print(f"{n:>7} {label:>5} {cells}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+bench_prefilter.py  – recall of the BM25 prefilter on historical days
+────────────────────────────────────────────────────────────────────────────
+Every FILE is one day's full paper list (JSONL as written by `fetch_cscl`'s
+cache, or any list of paper dicts).  Each day is embedded once, then the
+final top-N is computed from all papers and from the BM25 survivors for every
+--prefilter M.  Dense scores do not depend on which other papers are present,
+so a difference can only come from the prefilter dropping a real pick.
+
+    python benchmarks/bench_prefilter.py --top 5 --prefilter 10 20 40 DAY.jsonl …
+"""
+from __future__ import annotations
+
+import argparse, pathlib, sys, time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+from corpus import ROOT, load_corpus
+
+sys.path.insert(0, str(ROOT))
+import mt_arxiv_digest as m
+from embed_store import EmbeddingStore
+from prefilter import lexical_candidates
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark BM25 prefilter recall.")
+    ap.add_argument("days", nargs="+", type=pathlib.Path, help="One file per historical day.")
+    ap.add_argument("--top", type=int, default=m.DEFAULT_MAX_PICKS,
+                    help="Digest size N (default: %(default)s).")
+    ap.add_argument("--prefilter", type=int, nargs="+", default=[10, 20, 40],
+                    help="Values of M to test (margin %d is added)." % m.PREFILTER_MARGIN)
+    ap.add_argument("--no-cache", action="store_true", help="Bypass the embedding cache.")
+    ns = ap.parse_args()
+
+    store = None if ns.no_cache else EmbeddingStore(m.CACHE_DIR, m.embed_namespace())
+    rows = {M: {"same_set": 0, "same_order": 0, "recall": 0.0, "pruned": 0.0, "lex_ms": 0.0}
+            for M in ns.prefilter}
+    days = 0
+    for path in ns.days:
+        papers = load_corpus([path])
+        if not papers:
+            continue
+        days += 1
+        matrix, _ = m.embed_with_cache(papers, m.DEFAULT_BATCH_SIZE, store)
+        scores = m.score_matrix(matrix)
+        full = m.top_k(scores, ns.top)
+        for M, r in rows.items():
+            t = time.perf_counter()
+            keep = lexical_candidates(papers, m.CONCEPTS, M + m.PREFILTER_MARGIN)
+            r["lex_ms"] += 1000 * (time.perf_counter() - t)
+            two_stage = [keep[i] for i in m.top_k(scores[keep], ns.top)]
+            r["same_set"] += set(two_stage) == set(full)
+            r["same_order"] += two_stage == full
+            r["recall"] += len(set(two_stage) & set(full)) / max(1, len(full))
+            r["pruned"] += 1 - len(keep) / len(papers)
+
+    if not days:
+        raise SystemExit("No papers in the given files")
+    print(f"{days} days, top-{ns.top}\n")
+    print(f"{'M':>5} {'same set':>9} {'same order':>11} {'recall':>7} {'pruned':>7} {'bm25 ms':>8}")
+    for M, r in rows.items():
+        print(f"{M:>5} {r['same_set']:>5}/{days:<3} {r['same_order']:>7}/{days:<3} "
+              f"{r['recall'] / days:7.3f} {100 * r['pruned'] / days:6.1f}% {r['lex_ms'] / days:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+bench_startup.py  – startup cost of mt_arxiv_digest.py
+────────────────────────────────────────────────────────────────────────────
+Each measurement runs in a fresh interpreter so nothing is already imported:
+
+  * import   – `import mt_arxiv_digest`
+  * --help   – full CLI round-trip that never touches the model
+  * first    – process start → first paper ranked (model load + concept
+               vector + one encode), embedding cache bypassed
+
+    python benchmarks/bench_startup.py [--runs 5] [corpus.jsonl | mt_digest_*.md …]
+"""
+from __future__ import annotations
+
+import argparse, json, statistics, subprocess, sys, time
+import pathlib
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+from corpus import ROOT, load_corpus
+
+IMPORT_SNIPPET = """
+import sys, time; t = time.perf_counter(); sys.path.insert(0, {root!r})
+import mt_arxiv_digest
+print(time.perf_counter() - t)
+"""
+
+FIRST_RANK_SNIPPET = """
+import sys, time, json; t = time.perf_counter(); sys.path.insert(0, {root!r})
+import mt_arxiv_digest as m
+m.rank_mt_papers([json.loads({paper!r})], 1)
+print(time.perf_counter() - t)
+"""
+
+
+def run_py(code: str) -> float:
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+                         capture_output=True, text=True).stdout
+    return float(out.strip().splitlines()[-1])
+
+
+def run_help() -> float:
+    t = time.perf_counter()
+    subprocess.run([sys.executable, str(ROOT / "mt_arxiv_digest.py"), "--help"],
+                   cwd=ROOT, check=True, capture_output=True)
+    return time.perf_counter() - t
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark digest start-up time.")
+    ap.add_argument("corpus", nargs="*", type=pathlib.Path,
+                    help="JSONL / digest markdown files (default: repo digests).")
+    ap.add_argument("--runs", type=int, default=5, help="Repetitions (default: %(default)s).")
+    ns = ap.parse_args()
+
+    papers = load_corpus(ns.corpus)
+    if not papers:
+        raise SystemExit("Empty corpus – pass a JSONL file or a digest markdown file")
+    paper = json.dumps(papers[0])
+
+    results = {
+        "import": [run_py(IMPORT_SNIPPET.format(root=str(ROOT))) for _ in range(ns.runs)],
+        "--help": [run_help() for _ in range(ns.runs)],
+        "first_ranked": [run_py(FIRST_RANK_SNIPPET.format(root=str(ROOT), paper=paper))
+                         for _ in range(ns.runs)],
+    }
+    for name, xs in results.items():
+        print(f"{name:>13}: median {statistics.median(xs):7.3f}s  "
+              f"min {min(xs):7.3f}s  max {max(xs):7.3f}s  (n={len(xs)})")
+
+
+if __name__ == "__main__":
+    main()
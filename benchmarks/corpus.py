@@ -0,0 +1,39 @@
+"""
+corpus.py  – fixed paper corpora for the benchmark scripts
+────────────────────────────────────────────────────────────────────────────
+`load_corpus()` accepts JSONL files (one paper dict per line, as produced by
+`fetch_cscl`) and/or published `mt_digest_*.md` files, parsed back into
+paper dicts with the archive builder's `parse_digest`.
+With no paths it falls back to every digest in the repo root.
+"""
+from __future__ import annotations
+
+import json, pathlib, sys
+from typing import Dict, Iterable, List
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+from build_archive import parse_digest
+
+
+def _from_md(path: pathlib.Path) -> List[Dict]:
+    _, _, entries = parse_digest(path.read_text(encoding="utf-8"))
+    return [{
+        "id": e["url"].rstrip("/").rsplit("/", 1)[-1] or e["title"],
+        "title": e["title"],
+        "abstract": e["abstract"],
+        "url": e["url"],
+    } for e in entries]
+
+
+def _from_jsonl(path: pathlib.Path) -> List[Dict]:
+    with path.open(encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def load_corpus(paths: Iterable[pathlib.Path] = ()) -> List[Dict]:
+    paths = list(paths) or sorted(ROOT.glob("mt_digest_*.md"))
+    papers: List[Dict] = []
+    for p in map(pathlib.Path, paths):
+        papers += _from_jsonl(p) if p.suffix == ".jsonl" else _from_md(p)
+    return papers
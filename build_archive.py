@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+build_archive.py  – static newsletter archive + client-side search index
+────────────────────────────────────────────────────────────────────────────
+Compiles the `mt_digest_*.md` files in the repo root into
+
+    public/newsletter/archive/
+        index.html                 list of all digests + search box
+        <YYYY-MM-DD>.html          one page per digest
+        search.js                  (hand-written, not generated)
+        search/meta.json           shard count, doc count, months, stopwords
+        search/terms/<nn>.json     inverted index shard: term → [[doc, weight], …]
+        search/docs/<YYYY-MM>.json doc → {t: title, u: url, d: date, s: snippet}
+        search/vectors.json/.i8    optional int8 paper embeddings (--embeddings)
+        .build-manifest.json       per-digest content hash + shards it touched
+
+Builds are incremental: only digests whose content hash changed are parsed,
+rendered and re-indexed, and only the term shards / month files they touch
+are rewritten.  Doc keys are "<date>:<n>" so they stay stable across builds.
+
+Terms go to shard FNV-1a(term) % N_SHARDS; search.js computes the same hash
+and fetches only the shards its query needs.  `--embeddings` copies the
+vectors of picked papers out of the historical paper index (vector_index.py),
+quantised to int8 with one scale per paper, for "similar papers" in the browser;
+new digests only append their rows.  Links are rendered only for http(s) URLs.
+
+    python build_archive.py [--embeddings] [--full]
+"""
+from __future__ import annotations
+
+import argparse, hashlib, html, json, math, os, pathlib, re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+BASE_DIR = pathlib.Path(__file__).parent
+OUT_DIR = BASE_DIR / "public" / "newsletter" / "archive"
+BUILD_VERSION = 2              # bump to force a full rebuild after format changes
+N_SHARDS = 64
+SNIPPET_CHARS = 240
+TITLE_WEIGHT = 3               # a title hit counts like three abstract hits
+STOPWORDS = sorted(set("""
+a an and are as at be by for from has have in is it its of on or our that the their
+this to we which with using based via these than into can also both between more
+""".split()))
+
+_LINK = re.compile(r"\[([^\]]+)\]\(([^)\s]+)\)")
+_TOKEN = re.compile(r"[a-z0-9]+")
+_DIGEST = re.compile(r"mt_digest_(\d{4}-\d{2}-\d{2})\.md$")
+RELATED_PREFIX = "*Related earlier picks:*"
+
+
+# ── PARSING ──────────────────────────────────────────────────────────────
+def parse_digest(text: str) -> Tuple[Optional[str], List[str], List[Dict]]:
+    """Split a digest into (title, preface paragraphs, papers).
+
+    Each paper is {"title", "url", "abstract", "related": [(title, url), …]}.
+    """
+    title, preface, papers = None, [], []
+    for block in re.split(r"\n\s*\n", text.strip()):
+        block = block.strip()
+        if not block:
+            continue
+        m = re.match(r"^## \[(.+)\]\(([^)]*)\)$", block)
+        if m:
+            papers.append({"title": m[1], "url": m[2], "abstract": "", "related": []})
+        elif block.startswith("# ") and title is None and not papers and not preface:
+            title = block[2:].strip()
+        elif block.startswith(RELATED_PREFIX) and papers:
+            papers[-1]["related"] = _LINK.findall(block)
+        elif papers:
+            joined = " ".join(block.split())
+            papers[-1]["abstract"] = f"{papers[-1]['abstract']} {joined}".strip()
+        else:
+            preface.append(" ".join(block.split()))
+    return title, preface, papers
+
+
+def tokenize(text: str) -> List[str]:
+    """Same rules as search.js: lower-case [a-z0-9]+, translat* folded,
+    stopwords and 1-char tokens dropped."""
+    stop = _STOP
+    return ["translat" if t.startswith("translat") else t
+            for t in _TOKEN.findall(text.lower()) if len(t) > 1 and t not in stop]
+
+
+_STOP = frozenset(STOPWORDS)
+
+
+def fnv1a(term: str) -> int:
+    h = 0x811C9DC5
+    for ch in term.encode("utf-8"):
+        h = ((h ^ ch) * 0x01000193) & 0xFFFFFFFF
+    return h
+
+
+def shard_of(term: str) -> int:
+    return fnv1a(term) % N_SHARDS
+
+
+def doc_weights(paper: Dict) -> Dict[str, int]:
+    """Per-term weight of one paper: title hits ×TITLE_WEIGHT + log-scaled tf."""
+    tf = Counter(tokenize(paper["abstract"]))
+    for t in tokenize(paper["title"]):
+        tf[t] += TITLE_WEIGHT
+    return {t: max(1, round(10 * (1 + math.log(n)))) for t, n in tf.items()}
+
+
+# ── RENDERING ────────────────────────────────────────────────────────────
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+  <head>
+    <meta charset="utf-8" />
+    <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+    <title>{title} – Yukajii</title>
+  </head>
+  <body style="font-family: sans-serif; max-width: 40rem; margin: 3rem auto">
+{body}
+  </body>
+</html>
+"""
+
+
+def safe_url(url: str) -> str:
+    """*url* if it is http(s), else "" – javascript:, data:, … never get linked."""
+    return url if re.match(r"https?://", url, re.I) else ""
+
+
+def link(label: str, url: str) -> str:
+    """<a> for http(s) URLs; anything else stays text."""
+    if not safe_url(url):
+        return html.escape(label)
+    return f'<a href="{html.escape(url)}">{html.escape(label)}</a>'
+
+
+def inline(text: str) -> str:
+    """Escape *text*, then render [links](url), **bold** and *italics*."""
+    out, pos = [], 0
+    for m in _LINK.finditer(text):
+        out.append(html.escape(text[pos:m.start()]))
+        out.append(link(m[1], m[2]))
+        pos = m.end()
+    out.append(html.escape(text[pos:]))
+    s = "".join(out)
+    s = re.sub(r"\*\*(.+?)\*\*", r"<strong>\1</strong>", s)
+    return re.sub(r"(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])", r"<em>\1</em>", s)
+
+
+def render_digest(date: str, text: str) -> str:
+    title, preface, papers = parse_digest(text)
+    title = title or f"Machine-Translation Digest — {date}"
+    body = [f"    <h1>{inline(title)}</h1>"]
+    body += [f"    <p>{inline(p)}</p>" for p in preface]
+    for p in papers:
+        body.append(f'    <h2>{link(p["title"], p["url"])}</h2>')
+        body.append(f"    <p>{inline(p['abstract'])}</p>")
+        if p["related"]:
+            links = "; ".join(link(t, u) for t, u in p["related"])
+            body.append(f"    <p><em>Related earlier picks:</em> {links}</p>")
+    body.append('    <p><a href="./">← Archive</a> · <a href="/newsletter/">Newsletter</a></p>')
+    return PAGE.format(title=html.escape(title), body="\n".join(body))
+
+
+def render_index(dates: List[str], counts: Dict[str, int]) -> str:
+    items = "\n".join(f'      <li><a href="{d}.html">{d}</a> – {counts.get(d, 0)} papers</li>'
+                      for d in sorted(dates, reverse=True))
+    body = f"""    <h1>Daily MT Picks – Archive</h1>
+    <p>
+      <input id="q" type="search" placeholder="Search {sum(counts.values())} past picks…"
+             style="width: 100%; padding: 8px; font-size: 1rem" autocomplete="off" />
+    </p>
+    <div id="results"></div>
+    <ul id="digests">
+{items}
+    </ul>
+    <p><a href="/newsletter/">← Newsletter</a></p>
+    <script src="search.js" defer></script>"""
+    return PAGE.format(title="Archive", body=body)
+
+
+# ── BUILD ────────────────────────────────────────────────────────────────
+def _write_json(path: pathlib.Path, obj) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(obj, ensure_ascii=False, sort_keys=True,
+                              separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _read_json(path: pathlib.Path, default):
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else default
+
+
+def build(src_dir: pathlib.Path = BASE_DIR, out_dir: pathlib.Path = OUT_DIR,
+          full: bool = False, embeddings: bool = False) -> Dict[str, int]:
+    """Bring *out_dir* up to date with the digests in *src_dir*."""
+    search = out_dir / "search"
+    manifest_path = out_dir / ".build-manifest.json"
+    manifest = {} if full else _read_json(manifest_path, {})
+    if manifest.get("version") != BUILD_VERSION:
+        manifest = {"version": BUILD_VERSION, "digests": {}}
+        full = True
+    if full:
+        # Without a manifest nothing tells us what earlier builds wrote, so
+        # start from empty output rather than leave deleted digests behind.
+        for stale_path in [*out_dir.glob("*.html"), *search.glob("terms/*.json"),
+                           *search.glob("docs/*.json"),
+                           search / "vectors.json", search / "vectors.i8"]:
+            stale_path.unlink(missing_ok=True)
+    known: Dict[str, Dict] = manifest["digests"]
+
+    sources = {}
+    for path in src_dir.glob("mt_digest_*.md"):
+        m = _DIGEST.search(path.name)
+        if m:
+            sources[m[1]] = path
+    texts, changed = {}, []
+    for date, path in sources.items():
+        text = path.read_text(encoding="utf-8")
+        sha = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        if known.get(date, {}).get("sha") != sha:
+            texts[date] = text
+            changed.append(date)
+    removed = [d for d in known if d not in sources]
+
+    dirty_shards, dirty_months = set(), set()
+    for date in changed + removed:
+        dirty_shards.update(known.get(date, {}).get("shards", []))
+        dirty_months.add(date[:7])
+
+    postings: Dict[int, Dict[str, List]] = defaultdict(dict)   # shard → new term postings
+    docs_by_month: Dict[str, Dict[str, Dict]] = defaultdict(dict)
+    parsed: Dict[str, List[Dict]] = {}
+    for date in changed:
+        papers = parsed[date] = parse_digest(texts[date])[2]
+        shards = set()
+        for i, p in enumerate(papers):
+            key = f"{date}:{i}"
+            docs_by_month[date[:7]][key] = {
+                "t": p["title"], "u": safe_url(p["url"]), "d": date,
+                "s": p["abstract"][:SNIPPET_CHARS],
+            }
+            for term, w in doc_weights(p).items():
+                sh = shard_of(term)
+                shards.add(sh)
+                postings[sh].setdefault(term, []).append([key, w])
+        dirty_shards |= shards
+        (out_dir / f"{date}.html").parent.mkdir(parents=True, exist_ok=True)
+        (out_dir / f"{date}.html").write_text(render_digest(date, texts[date]), encoding="utf-8")
+        known[date] = {"sha": hashlib.sha1(texts[date].encode("utf-8")).hexdigest(),
+                       "docs": len(papers), "shards": sorted(shards)}
+    for date in removed:
+        (out_dir / f"{date}.html").unlink(missing_ok=True)
+        del known[date]
+
+    stale = set(changed) | set(removed)
+    for sh in dirty_shards:
+        path = search / "terms" / f"{sh:02d}.json"
+        shard = _read_json(path, {})
+        for term in list(shard):
+            kept = [p for p in shard[term] if p[0].split(":")[0] not in stale]
+            if kept:
+                shard[term] = kept
+            else:
+                del shard[term]
+        for term, plist in postings.get(sh, {}).items():
+            shard[term] = sorted(shard.get(term, []) + plist)
+        if shard:
+            _write_json(path, shard)
+        else:
+            path.unlink(missing_ok=True)
+
+    for month in dirty_months:
+        path = search / "docs" / f"{month}.json"
+        docs = _read_json(path, {})
+        docs = {k: v for k, v in docs.items() if k.split(":")[0] not in stale}
+        docs.update(docs_by_month.get(month, {}))
+        if docs:
+            _write_json(path, docs)
+        else:
+            path.unlink(missing_ok=True)
+
+    counts = {d: e["docs"] for d, e in known.items()}
+    vectors = None
+    if embeddings:
+        vectors = write_vectors(search, sources, known, parsed, stale, full)
+    elif (search / "vectors.json").exists():
+        vectors = _read_json(search / "vectors.json", {}).get("meta")
+    _write_json(search / "meta.json", {
+        "version": BUILD_VERSION,
+        "shards": N_SHARDS,
+        "docs": sum(counts.values()),
+        "months": sorted({d[:7] for d in known}),
+        "stopwords": STOPWORDS,
+        "vectors": vectors,
+    })
+    (out_dir / "index.html").write_text(render_index(list(known), counts), encoding="utf-8")
+    _write_json(manifest_path, manifest)
+    return {"digests": len(known), "rebuilt": len(changed), "removed": len(removed),
+            "shards_written": len(dirty_shards), "docs": sum(counts.values())}
+
+
+def write_vectors(search: pathlib.Path, sources: Dict[str, pathlib.Path],
+                  known: Dict[str, Dict], parsed: Dict[str, List[Dict]],
+                  stale: Set[str], full: bool) -> Optional[Dict]:
+    """int8 copy of each picked paper's embedding from the paper index.
+
+    Rows of new digests are appended; only an edited or removed digest makes
+    the existing rows get filtered and rewritten.  The first export (or
+    --full) walks every digest.
+    """
+    import numpy as np
+    from embed_store import DEFAULT_MODEL, base_id
+    from vector_index import DEFAULT_ROOT, PaperIndex
+
+    info_path, vec_path = search / "vectors.json", search / "vectors.i8"
+    info = None if full else _read_json(info_path, None)
+    if info is None:
+        todo, keys, scales = sorted(known), [], []
+        vec_path.unlink(missing_ok=True)
+    else:
+        todo, keys, scales = sorted(d for d in stale if d in known), info["keys"], info["scales"]
+    if not todo and not stale:
+        return info and info["meta"]
+
+    new_keys, rows = [], []
+    index = PaperIndex(DEFAULT_ROOT, os.getenv("EMBED_MODEL_NAME", DEFAULT_MODEL)) if todo else None
+    for date in todo:
+        papers = parsed.get(date)
+        if papers is None:
+            papers = parse_digest(sources[date].read_text(encoding="utf-8"))[2]
+        for i, p in enumerate(papers):
+            row = index.row_of.get(base_id(p["url"].rstrip("/").rsplit("/", 1)[-1]))
+            if row is not None:
+                new_keys.append(f"{date}:{i}")
+                rows.append(row)
+    if not (keys or rows):
+        return None
+
+    dim = info["meta"]["dim"] if info else index.dim
+    keep = [n for n, k in enumerate(keys) if k.split(":")[0] not in stale]
+    if len(keep) < len(keys):                  # edited / removed digests: rewrite
+        old = np.fromfile(vec_path, dtype=np.int8).reshape(-1, dim)[:len(keys)]
+        vec_path.write_bytes(old[keep].tobytes())
+        keys, scales = [keys[n] for n in keep], [scales[n] for n in keep]
+    elif vec_path.exists() and vec_path.stat().st_size > len(keys) * dim:
+        os.truncate(vec_path, len(keys) * dim)  # rows of a build that died mid-way
+    if rows:
+        vecs = index.take(rows)
+        row_scales = np.abs(vecs).max(axis=1).clip(min=1e-12) / 127
+        with open(vec_path, "ab") as fh:
+            fh.write(np.round(vecs / row_scales[:, None]).astype(np.int8).tobytes())
+        keys = keys + new_keys
+        scales = scales + [round(float(x), 8) for x in row_scales]
+    if not keys:
+        info_path.unlink(missing_ok=True)
+        vec_path.unlink(missing_ok=True)
+        return None
+    meta = {"dim": dim, "count": len(keys)}
+    _write_json(info_path, {"meta": meta, "keys": keys, "scales": scales})
+    return meta
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build the static newsletter archive.")
+    ap.add_argument("--src", type=pathlib.Path, default=BASE_DIR,
+                    help="Directory holding mt_digest_*.md (default: repo root).")
+    ap.add_argument("--out", type=pathlib.Path, default=OUT_DIR,
+                    help="Output directory (default: %(default)s).")
+    ap.add_argument("--full", action="store_true",
+                    help="Ignore the manifest, clear generated output and rebuild all.")
+    ap.add_argument("--embeddings", action="store_true",
+                    help="Also export int8 paper embeddings from the paper index.")
+    ns = ap.parse_args()
+    stats = build(ns.src, ns.out, full=ns.full, embeddings=ns.embeddings)
+    print(f"✓ Archive: {stats['digests']} digests ({stats['rebuilt']} rebuilt, "
+          f"{stats['removed']} removed), {stats['docs']} papers, "
+          f"{stats['shards_written']} term shards written → {ns.out}")
+
+
+if __name__ == "__main__":
+    main()
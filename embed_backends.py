@@ -0,0 +1,124 @@
+"""
+embed_backends.py  – interchangeable CPU inference backends for the embedder
+────────────────────────────────────────────────────────────────────────────
+Every backend exposes the slice of the SentenceTransformer API the digest
+uses:  ``encode(texts, batch_size=…, normalize_embeddings=…, convert_to_numpy=…)``
+
+  torch      SentenceTransformer in fp32 (the reference path)
+  onnx-int8  EXPERIMENTAL.  The same transformer exported to ONNX, weights
+             dynamically quantised to int8, run by ONNX Runtime; mean pooling
+             as in e5.  Needs `pip install onnx onnxruntime`.  The export is
+             done once and kept under <cache>/onnx/<model-slug>/.  Neither the
+             export nor its ranking quality has been checked against torch
+             yet – run benchmarks/bench_backends.py on a saved day
+             (.cache/arxiv/<date>.jsonl) before switching the workflow to it.
+
+Select with `--backend` or the EMBED_BACKEND env var.
+"""
+from __future__ import annotations
+
+import pathlib
+from typing import List, Union
+
+import numpy as np
+
+from embed_store import model_slug
+
+BACKENDS = ("torch", "onnx-int8")
+MAX_SEQ_LEN = 512
+
+
+class TorchBackend:
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts, batch_size: int = 32, normalize_embeddings: bool = False,
+               convert_to_numpy: bool = True):
+        return self.model.encode(texts, batch_size=batch_size,
+                                 normalize_embeddings=normalize_embeddings,
+                                 convert_to_numpy=convert_to_numpy)
+
+
+class OnnxInt8Backend:
+    def __init__(self, model_name: str, cache_dir: pathlib.Path):
+        try:
+            import onnxruntime as ort
+            from transformers import AutoTokenizer
+        except ImportError as exc:
+            raise SystemExit(f"onnx-int8 backend needs onnxruntime + transformers ({exc})")
+
+        out = pathlib.Path(cache_dir) / "onnx" / model_slug(model_name)
+        int8_path = out / "model.int8.onnx"
+        if not int8_path.exists():
+            export_int8(model_name, out)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(int8_path), opts,
+                                            providers=["CPUExecutionProvider"])
+
+    def encode(self, texts: Union[str, List[str]], batch_size: int = 32,
+               normalize_embeddings: bool = False, convert_to_numpy: bool = True):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        chunks = []
+        for start in range(0, len(texts), batch_size):
+            tok = self.tokenizer(texts[start:start + batch_size], padding=True,
+                                 truncation=True, max_length=MAX_SEQ_LEN,
+                                 return_tensors="np")
+            mask = tok["attention_mask"].astype(np.int64)
+            hidden = self.session.run(None, {
+                "input_ids": tok["input_ids"].astype(np.int64),
+                "attention_mask": mask,
+            })[0]
+            summed = (hidden * mask[..., None]).sum(axis=1)
+            chunks.append(summed / np.clip(mask.sum(axis=1, keepdims=True), 1, None))
+        vecs = (np.concatenate(chunks) if chunks
+                else np.empty((0, 0), dtype=np.float32)).astype(np.float32)
+        if normalize_embeddings and len(vecs):
+            vecs /= np.linalg.norm(vecs, axis=1, keepdims=True).clip(min=1e-12)
+        return vecs[0] if single else vecs
+
+
+def export_int8(model_name: str, out: pathlib.Path) -> pathlib.Path:
+    """Export *model_name* to ONNX and write a dynamic-int8 copy beside it."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    class _LastHidden(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask):
+            return self.model(input_ids=input_ids,
+                              attention_mask=attention_mask).last_hidden_state
+
+    out.mkdir(parents=True, exist_ok=True)
+    fp32_path, int8_path = out / "model.onnx", out / "model.int8.onnx"
+    print(f"⏳ Exporting {model_name} to ONNX (one-off)…")
+    tok = AutoTokenizer.from_pretrained(model_name)
+    model = _LastHidden(AutoModel.from_pretrained(model_name).eval())
+    dummy = tok(["query: machine translation"], return_tensors="pt")
+    axes = {0: "batch", 1: "seq"}
+    with torch.no_grad():
+        torch.onnx.export(model, (dummy["input_ids"], dummy["attention_mask"]),
+                          str(fp32_path), opset_version=14,
+                          input_names=["input_ids", "attention_mask"],
+                          output_names=["last_hidden_state"],
+                          dynamic_axes={"input_ids": axes, "attention_mask": axes,
+                                        "last_hidden_state": axes})
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    return int8_path
+
+
+def load_backend(name: str, model_name: str, cache_dir: pathlib.Path):
+    if name == "torch":
+        return TorchBackend(model_name)
+    if name == "onnx-int8":
+        print("⚠️  onnx-int8 is an experimental backend – rankings are not yet "
+              "validated against torch (see benchmarks/bench_backends.py)")
+        return OnnxInt8Backend(model_name, cache_dir)
+    raise SystemExit(f"Unknown embedding backend {name!r} (choose from {', '.join(BACKENDS)})")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+embed_store.py  – persistent paper-embedding cache for mt_arxiv_digest.py
+────────────────────────────────────────────────────────────────────────────
+Layout (one directory per embedding model):
+
+    <root>/<model-slug>/vectors.f16   raw float16 matrix, one row per entry
+    <root>/<model-slug>/index.json    {"dim": D, "rows": N, "entries": {...}}
+
+Entries are keyed by the version-less arXiv id ("2505.17015", not
+"2505.17015v2") and carry a hash of the embedded text, so a revision whose
+title + abstract did not change is still a cache hit.  Rows are only ever
+appended; stale and evicted rows are reclaimed by `compact`.
+
+CLI
+---
+    python embed_store.py stats
+    python embed_store.py compact [--max-age-days N] [--max-entries N]
+"""
+from __future__ import annotations
+
+import argparse, datetime as dt, hashlib, json, os, pathlib, re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_ROOT = pathlib.Path(__file__).parent / ".cache" / "embeddings"
+DEFAULT_MODEL = "intfloat/e5-large-v2"
+
+
+def model_slug(model_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "__", model_name)
+
+
+def base_id(arxiv_id: str) -> str:
+    """Strip the version suffix: ``2505.17015v2`` → ``2505.17015``."""
+    return re.sub(r"v\d+$", "", arxiv_id)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+class EmbeddingStore:
+    """Memory-mapped float16 embedding matrix + JSON id/hash index."""
+
+    def __init__(self, root: pathlib.Path, model_name: str):
+        self.dir = pathlib.Path(root) / model_slug(model_name)     # created on first write
+        self.vec_path = self.dir / "vectors.f16"
+        self.idx_path = self.dir / "index.json"
+        self.model_name = model_name
+        if self.idx_path.exists():
+            idx = json.loads(self.idx_path.read_text(encoding="utf-8"))
+        else:
+            idx = {"model": model_name, "dim": None, "rows": 0, "entries": {}}
+        self.dim: Optional[int] = idx["dim"]
+        self.rows: int = idx["rows"]
+        self.entries: Dict[str, Dict] = idx["entries"]
+        self._mm: Optional[np.memmap] = None
+
+    # ── reads ────────────────────────────────────────────────────────────
+    def _matrix(self) -> np.ndarray:
+        if self.rows == 0:
+            return np.empty((0, self.dim or 0), dtype=np.float16)
+        if self._mm is None or self._mm.shape[0] != self.rows:
+            self._mm = np.memmap(self.vec_path, dtype=np.float16, mode="r",
+                                 shape=(self.rows, self.dim))
+        return self._mm
+
+    def lookup(self, ids: Iterable[str], hashes: Iterable[str]) -> Dict[int, np.ndarray]:
+        """Return ``{position: float32 vector}`` for every cache hit."""
+        today = dt.date.today().isoformat()
+        hits: Dict[int, np.ndarray] = {}
+        rows: List[Tuple[int, int]] = []
+        for pos, (pid, h) in enumerate(zip(ids, hashes)):
+            e = self.entries.get(base_id(pid))
+            if e and e["hash"] == h:
+                rows.append((pos, e["row"]))
+                e["used"] = today
+        if rows:
+            mat = self._matrix()
+            for pos, row in rows:
+                hits[pos] = np.asarray(mat[row], dtype=np.float32)
+        return hits
+
+    def vectors(self) -> Tuple[List[str], np.ndarray]:
+        """All live entries as (ids, float16 matrix) in row order."""
+        live = sorted(self.entries.items(), key=lambda kv: kv[1]["row"])
+        mat = self._matrix()
+        return [k for k, _ in live], np.asarray(mat[[e["row"] for _, e in live]])
+
+    # ── writes ───────────────────────────────────────────────────────────
+    def put(self, ids: List[str], hashes: List[str], vecs: np.ndarray) -> None:
+        """Append *vecs* (one row per id) and point the index at them."""
+        if not ids:
+            return
+        vecs = np.asarray(vecs, dtype=np.float16)
+        if self.dim is None:
+            self.dim = int(vecs.shape[1])
+        elif vecs.shape[1] != self.dim:
+            raise ValueError(f"dim mismatch: store has {self.dim}, got {vecs.shape[1]}")
+        self._mm = None
+        self.dir.mkdir(parents=True, exist_ok=True)
+        # rows appended by a run that died before save() are not indexed
+        if self.vec_path.exists() and self.vec_path.stat().st_size > self.rows * self.dim * 2:
+            os.truncate(self.vec_path, self.rows * self.dim * 2)
+        with open(self.vec_path, "ab") as fh:
+            fh.write(np.ascontiguousarray(vecs).tobytes())
+        today = dt.date.today().isoformat()
+        for i, (pid, h) in enumerate(zip(ids, hashes)):
+            self.entries[base_id(pid)] = {"row": self.rows + i, "hash": h, "used": today}
+        self.rows += len(ids)
+
+    def save(self) -> None:
+        idx = {"model": self.model_name, "dim": self.dim,
+               "rows": self.rows, "entries": self.entries}
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.idx_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(idx, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.idx_path)
+
+    def compact(self, max_age_days: Optional[int] = None,
+                max_entries: Optional[int] = None) -> Tuple[int, int]:
+        """Evict old / surplus entries and rewrite the matrix without holes.
+
+        Returns (entries_evicted, rows_reclaimed).
+        """
+        live = dict(self.entries)
+        if max_age_days is not None:
+            cutoff = (dt.date.today() - dt.timedelta(days=max_age_days)).isoformat()
+            live = {k: e for k, e in live.items() if e["used"] >= cutoff}
+        if max_entries is not None and len(live) > max_entries:
+            newest = sorted(live.items(), key=lambda kv: (kv[1]["used"], kv[1]["row"]))
+            live = dict(newest[len(live) - max_entries:])
+
+        evicted, old_rows = len(self.entries) - len(live), self.rows
+        order = sorted(live.items(), key=lambda kv: kv[1]["row"])
+        if order:
+            mat = np.asarray(self._matrix()[[e["row"] for _, e in order]])
+        else:
+            mat = np.empty((0, self.dim or 0), dtype=np.float16)
+        self._mm = None
+        tmp = self.vec_path.with_suffix(".tmp")
+        tmp.write_bytes(np.ascontiguousarray(mat).tobytes())
+        os.replace(tmp, self.vec_path)
+
+        self.entries = {k: dict(e, row=i) for i, (k, e) in enumerate(order)}
+        self.rows = len(order)
+        self.save()
+        return evicted, old_rows - self.rows
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description="Inspect or compact the embedding cache.")
+    ap.add_argument("--root", type=pathlib.Path, default=DEFAULT_ROOT,
+                    help="Cache root directory (default: %(default)s).")
+    ap.add_argument("--model", default=os.getenv("EMBED_MODEL_NAME", DEFAULT_MODEL),
+                    help="Embedding model namespace (default: %(default)s).")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("stats", help="Print entry / row counts.")
+    cp = sub.add_parser("compact", help="Evict entries and reclaim dead rows.")
+    cp.add_argument("--max-age-days", type=int, help="Drop entries unused for N days.")
+    cp.add_argument("--max-entries", type=int, help="Keep only the N most recently used.")
+    ns = ap.parse_args()
+
+    store = EmbeddingStore(ns.root, ns.model)
+    if ns.cmd == "stats":
+        size = store.vec_path.stat().st_size if store.vec_path.exists() else 0
+        print(f"{store.dir}: {len(store.entries)} entries, {store.rows} rows, "
+              f"dim={store.dim}, {size / 2**20:.1f} MiB")
+    else:
+        evicted, reclaimed = store.compact(ns.max_age_days, ns.max_entries)
+        print(f"✓ Evicted {evicted} entries, reclaimed {reclaimed} rows "
+              f"→ {len(store.entries)} live")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+mock_buttondown.py  – local stand-in for the slice of the Buttondown API
+that send_digest.py uses, with fault injection.
+
+    python mock_buttondown.py --port 8765 --fail-first 2 --status 503
+    BUTTONDOWN_API=http://127.0.0.1:8765/v1 BUTTONDOWN_TOKEN=x \\
+        python send_digest.py mt_digest_2025-05-22.md
+
+Endpoints
+---------
+POST /v1/emails                    create draft (400 email_duplicate on same subject)
+GET  /v1/emails?state=&search=     list e-mails (optionally by state) whose subject contains `search`
+POST /v1/emails/<id>/send-draft    send (400 email_duplicate if already sent)
+GET  /_stats                       request counts per endpoint, for assertions
+
+Faults
+------
+--fail-first N   the first N requests to every endpoint get --status
+                 (429 replies carry `Retry-After: --retry-after`)
+--search-lag S   new drafts stay invisible to search for S seconds
+--slow-first N   the first N requests to every endpoint are handled, but the
+                 reply is held back --delay seconds (client timeouts)
+"""
+from __future__ import annotations
+
+import argparse, json, re, threading, time, uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+from urllib.parse import parse_qs, urlparse
+
+
+class MockState:
+    def __init__(self, fail_first: int = 0, status: int = 503,
+                 retry_after: int = 0, search_lag: float = 0.0,
+                 slow_first: int = 0, delay: float = 0.0):
+        self.fail_first, self.status = fail_first, status
+        self.retry_after, self.search_lag = retry_after, search_lag
+        self.slow_first, self.delay = slow_first, delay
+        self.emails: Dict[str, Dict] = {}
+        self.calls: Counter = Counter()
+        self.lock = threading.Lock()
+
+
+def make_handler(state: MockState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):            # keep the console quiet
+            pass
+
+        def _reply(self, code: int, body: Dict, headers: Dict[str, str] = None):
+            raw = json.dumps(body).encode("utf-8")
+            try:
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(raw)
+            except (BrokenPipeError, ConnectionResetError):   # client timed out
+                pass
+
+        def _route(self, method: str):
+            url = urlparse(self.path)
+            if url.path == "/_stats":
+                return self._reply(200, dict(state.calls))
+            send = re.fullmatch(r"/v1/emails/([^/]+)/send-draft", url.path)
+            endpoint = (f"{method} /emails/send-draft" if send
+                        else f"{method} {url.path.removeprefix('/v1')}")
+            with state.lock:
+                state.calls[endpoint] += 1
+                failing = state.calls[endpoint] <= state.fail_first
+                slow = state.calls[endpoint] <= state.slow_first
+            if failing:
+                headers = ({"Retry-After": str(state.retry_after)}
+                           if state.status == 429 else {})
+                return self._reply(state.status, {"detail": "injected failure"}, headers)
+            if not self.headers.get("Authorization", "").startswith("Token "):
+                return self._reply(401, {"detail": "missing token"})
+
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+            with state.lock:
+                code, reply = self._apply(method, url, send, body)
+            if slow:                                   # acted on, answered too late
+                time.sleep(state.delay)
+            return self._reply(code, reply)
+
+        def _apply(self, method: str, url, send, body: Dict):
+            if method == "POST" and url.path == "/v1/emails":
+                if any(e["subject"] == body.get("subject") for e in state.emails.values()):
+                    return 400, {"code": "email_duplicate"}
+                eid = str(uuid.uuid4())
+                state.emails[eid] = {"id": eid, "subject": body.get("subject"),
+                                     "status": "draft", "created": time.time()}
+                return 201, dict(state.emails[eid])
+            if method == "GET" and url.path == "/v1/emails":
+                q = parse_qs(url.query)
+                want = q.get("state", [None])[0]
+                search = q.get("search", [""])[0]
+                now = time.time()
+                results = [dict(e) for e in state.emails.values()
+                           if (want is None or e["status"] == want)
+                           and search in e["subject"]
+                           and now - e["created"] >= state.search_lag]
+                return 200, {"results": results, "count": len(results)}
+            if method == "POST" and send:
+                email = state.emails.get(send.group(1))
+                if email is None:
+                    return 404, {"detail": "not found"}
+                if email["status"] == "sent":
+                    return 400, {"code": "email_duplicate"}
+                email["status"] = "sent"
+                return 200, {}
+            return 404, {"detail": "unknown endpoint"}
+
+        def do_GET(self):
+            self._route("GET")
+
+        def do_POST(self):
+            self._route("POST")
+
+    return Handler
+
+
+def serve(port: int = 0, **faults) -> ThreadingHTTPServer:
+    """Start the mock on a daemon thread; `server.server_port` is the port."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(MockState(**faults)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run a local mock of the Buttondown API.")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--fail-first", type=int, default=0,
+                    help="Fail the first N requests to every endpoint.")
+    ap.add_argument("--status", type=int, default=503, help="Status for injected failures.")
+    ap.add_argument("--retry-after", type=int, default=1, help="Retry-After for 429s.")
+    ap.add_argument("--search-lag", type=float, default=0.0,
+                    help="Seconds before a new draft shows up in search.")
+    ap.add_argument("--slow-first", type=int, default=0,
+                    help="Delay the replies to the first N requests to every endpoint.")
+    ap.add_argument("--delay", type=float, default=35.0,
+                    help="Reply delay for --slow-first, in seconds (default: %(default)s).")
+    ns = ap.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", ns.port), make_handler(MockState(
+        ns.fail_first, ns.status, ns.retry_after, ns.search_lag, ns.slow_first, ns.delay)))
+    print(f"Mock Buttondown on http://127.0.0.1:{ns.port}/v1  (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -8,23 +8,42 @@ Instead of asking GPT to pick papers, we now:
   2. Embed a fixed “machine-translation concept” prompt once.
   3. Cosine-score paper vs concept → keep the top-N.
 No extra tokens, no external services.
+
+Backfill a range with one model load (arXiv fetches run ahead on threads):
+    python mt_arxiv_digest.py --from 2025-05-01 --to 2025-05-31
 """
 from __future__ import annotations
 
-import argparse, datetime as dt, json, os, pathlib, re, textwrap, warnings
-from typing import List, Dict, Tuple
+import argparse, datetime as dt, json, os, pathlib, re, textwrap, threading, time, warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Tuple
 
 import numpy as np
-import arxiv, openai
-from sentence_transformers import SentenceTransformer   # NEW
+# torch / sentence_transformers / openai / arxiv are imported where first
+# needed, so --help, argument errors and empty days stay fast.
+
+from embed_backends import BACKENDS, load_backend
+from embed_store import EmbeddingStore, content_hash, model_slug
+from prefilter import lexical_candidates
+from response_cache import ResponseCache, request_key
+from stage_timer import StageTimer, measure
+from vector_index import PaperIndex
 
 # ── CONSTANTS ────────────────────────────────────────────────────────────
-MAX_RESULTS      = 222
+PAGE_SIZE        = 100                   # arXiv API results per request
+FETCH_RETRIES    = 4
+FETCH_BACKOFF_S  = 3.0                   # first retry delay, doubles each time
+CACHE_SETTLE_DAYS = 3                    # newer listings may still grow → never cached
 DEFAULT_MAX_PICKS = 5
+DEFAULT_BATCH_SIZE = 32                  # papers per encoder forward pass
+DEFAULT_PREFETCH = 2                     # days fetched ahead in --from/--to mode
+PREFILTER_MARGIN = 20                    # extra BM25 candidates kept beyond --prefilter
+PREFACE_WORKERS  = 2                     # GPT preface calls in flight at once
 PREFACE_MODEL    = "gpt-4o"              # unchanged
 USD_PER_TOKEN    = 0.000005
 
 EMBED_MODEL_NAME = "intfloat/e5-large-v2"               # NEW
+EMBED_BACKEND    = os.getenv("EMBED_BACKEND", "torch")  # see embed_backends.py
 CONCEPTS = [
     "machine translation",
     "neural machine translation",
@@ -44,58 +63,345 @@ CONCEPTS = [
 BASE_DIR = pathlib.Path(__file__).parent
 LOG_DIR  = BASE_DIR / "logs"
 LOG_DIR.mkdir(exist_ok=True)
-
-# ── MODEL SET-UP (done once per run) ─────────────────────────────────────
+MODEL_CACHE_DIR = BASE_DIR / ".cache"
+CACHE_DIR = MODEL_CACHE_DIR / "embeddings"
+ARXIV_CACHE_DIR = MODEL_CACHE_DIR / "arxiv"
+INDEX_DIR = MODEL_CACHE_DIR / "index"
+OPENAI_CACHE_DIR = MODEL_CACHE_DIR / "openai"
+OFFLINE_DIR = MODEL_CACHE_DIR / "offline"     # --offline digests + logs, never sent
+
+# ── MODEL SET-UP (lazy, at most once per process) ────────────────────────
 warnings.filterwarnings("ignore", message=r".*deprecated.*", category=DeprecationWarning)
-EMBEDDER = SentenceTransformer(EMBED_MODEL_NAME)
-CONCEPT_VECTOR = EMBEDDER.encode(
-    " ; ".join(CONCEPTS), normalize_embeddings=True
-)                                            # shape (768,)
+_EMBEDDER = None
+_CONCEPT_VECTOR = None
+_MODEL_INIT_STATS: Dict = {}
+_OPENAI_CLIENT = None
+_ARXIV_CLIENT = None
+_ARXIV_LOCK = threading.Lock()         # arXiv asks for one connection at a time
+
+
+def embed_namespace() -> str:
+    """Cache namespace: vectors from different backends are not mixed."""
+    if EMBED_BACKEND == "torch":
+        return EMBED_MODEL_NAME
+    return f"{EMBED_MODEL_NAME}@{EMBED_BACKEND}"
+
+
+def get_embedder():
+    """Load the EMBED_BACKEND embedder on first use."""
+    global _EMBEDDER
+    if _EMBEDDER is None:
+        with measure() as figures:
+            _EMBEDDER = load_backend(EMBED_BACKEND, EMBED_MODEL_NAME, MODEL_CACHE_DIR)
+        _MODEL_INIT_STATS.update(figures)
+    return _EMBEDDER
+
+
+def take_model_init_stats() -> Dict:
+    """Model-load figures, handed out once to the day that paid for them."""
+    stats = dict(_MODEL_INIT_STATS)
+    _MODEL_INIT_STATS.clear()
+    return stats
+
+
+def get_concept_vector(record: bool = True) -> np.ndarray:
+    """Concept embedding, persisted beside the paper cache of the same model.
+
+    The file name hashes the concept text, so editing CONCEPTS re-encodes.
+    *record* False keeps a freshly encoded vector in memory only.
+    """
+    global _CONCEPT_VECTOR
+    if _CONCEPT_VECTOR is None:
+        text = " ; ".join(CONCEPTS)
+        path = CACHE_DIR / model_slug(embed_namespace()) / f"concept-{content_hash(text)}.npy"
+        if path.exists():
+            _CONCEPT_VECTOR = np.load(path)
+        else:
+            _CONCEPT_VECTOR = get_embedder().encode(text, normalize_embeddings=True)
+            if record:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                np.save(path, _CONCEPT_VECTOR)
+    return _CONCEPT_VECTOR
 
 # ── HELPERS ──────────────────────────────────────────────────────────────
-def fetch_cscl(date: dt.date) -> List[Dict]:
+def fetch_cscl(date: dt.date, page_size: int = PAGE_SIZE,
+               offline: bool = False, refresh: bool = False) -> Iterator[Dict]:
+    """Yield every cs.CL paper submitted on *date*, page by page.
+
+    A complete listing is kept in ARXIV_CACHE_DIR/<date>.jsonl, so reruns and
+    backfills replay it without touching the network.  Empty listings and
+    dates less than CACHE_SETTLE_DAYS old are not cached: arXiv may simply not
+    have them yet.  *refresh* ignores the cache; *offline* never goes to arXiv
+    (a missing day yields nothing).
+    """
+    cache = ARXIV_CACHE_DIR / f"{date.isoformat()}.jsonl"
+    if cache.exists() and not refresh:
+        with cache.open(encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+        return
+    if offline:
+        print(f"⚠️  No cached arXiv listing for {date} (offline mode)")
+        return
+
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    part = cache.with_suffix(".part")
+    count = 0
+    with part.open("w", encoding="utf-8") as fh:
+        for paper in _stream_arxiv(date, page_size):
+            fh.write(json.dumps(paper, ensure_ascii=False) + "\n")
+            count += 1
+            yield paper
+    settled = dt.datetime.utcnow().date() - date >= dt.timedelta(days=CACHE_SETTLE_DAYS)
+    if count and settled:
+        os.replace(part, cache)                # only complete, settled days are cached
+    else:
+        part.unlink(missing_ok=True)
+
+
+def get_arxiv_client(page_size: int):
+    """One arxiv.Client per process, so its 3 s request spacing holds across days."""
+    global _ARXIV_CLIENT
+    if _ARXIV_CLIENT is None:
+        import arxiv
+        _ARXIV_CLIENT = arxiv.Client(page_size=page_size, num_retries=0)
+    return _ARXIV_CLIENT
+
+
+def _stream_arxiv(date: dt.date, page_size: int) -> Iterator[Dict]:
+    """Uncapped arXiv query; failed pages are retried with exponential backoff
+    and the listing resumes at the offset where it broke off.
+
+    Prefetch threads take turns: a day's listing holds _ARXIV_LOCK, so the
+    API only ever sees one request stream from us.
+    """
+    with _ARXIV_LOCK:
+        yield from _stream_arxiv_locked(date, page_size)
+
+
+def _stream_arxiv_locked(date: dt.date, page_size: int) -> Iterator[Dict]:
+    import arxiv
     day = date.strftime("%Y%m%d")
     q = f'cat:cs.CL AND submittedDate:[{day}0000 TO {day}2359]'
-    search = arxiv.Search(query=q, max_results=MAX_RESULTS,
+    search = arxiv.Search(query=q, max_results=None,
                           sort_by=arxiv.SortCriterion.SubmittedDate)
-    client = arxiv.Client()
-    papers = []
-    for p in client.results(search):
-        papers.append({
-            "id": p.get_short_id(),
-            "title": p.title.strip().replace("\n", " "),
-            "abstract": re.sub(r"\s+", " ", p.summary.strip()),
-            "url": p.pdf_url,
-        })
-    return papers
-
-
-def rank_mt_papers(papers: List[Dict], max_picks: int) -> List[int]:
-    """Return 1-based indices of the top *max_picks* MT-like papers."""
-    scores: List[Tuple[float, int]] = []
-    for idx, p in enumerate(papers, start=1):
-        vec = EMBEDDER.encode(
-            f"{p['title']} {p['abstract']}", normalize_embeddings=True
+    client = get_arxiv_client(page_size)
+    seen, attempt = 0, 0
+    while True:
+        try:
+            for p in client.results(search, offset=seen):
+                seen, attempt = seen + 1, 0
+                yield {
+                    "id": p.get_short_id(),
+                    "title": p.title.strip().replace("\n", " "),
+                    "abstract": re.sub(r"\s+", " ", p.summary.strip()),
+                    "url": p.pdf_url,
+                    "authors": [a.name for a in p.authors],
+                    "categories": p.categories,
+                    "published": p.published.isoformat(),
+                    "updated": p.updated.isoformat(),
+                }
+            return
+        except (arxiv.HTTPError, arxiv.UnexpectedEmptyPageError, OSError) as exc:
+            attempt += 1
+            if attempt > FETCH_RETRIES:
+                raise
+            wait = FETCH_BACKOFF_S * 2 ** (attempt - 1)
+            print(f"⚠️  arXiv page at offset {seen} failed ({exc}); "
+                  f"retry {attempt}/{FETCH_RETRIES} in {wait:.0f}s")
+            time.sleep(wait)
+
+
+def fetch_day(date: dt.date, ns) -> List[Dict]:
+    """Materialise one day's stream – ranking needs the whole day."""
+    return list(fetch_cscl(date, ns.page_size, offline=ns.offline, refresh=ns.refresh))
+
+
+def paper_text(p: Dict) -> str:
+    return f"{p['title']} {p['abstract']}"
+
+
+def encode_papers(papers: List[Dict], batch_size: int = DEFAULT_BATCH_SIZE) -> np.ndarray:
+    """Embed *papers* in batches → float32 matrix of shape (n_papers, dim).
+
+    Texts are encoded shortest-first so each batch pads to a similar length;
+    rows are scattered back so row *i* always belongs to ``papers[i]``.
+    """
+    texts = [paper_text(p) for p in papers]
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    matrix = None
+    for start in range(0, len(order), batch_size):
+        chunk = order[start:start + batch_size]
+        vecs = get_embedder().encode(
+            [texts[i] for i in chunk], batch_size=batch_size,
+            normalize_embeddings=True, convert_to_numpy=True,
         )
-        score = float(np.dot(CONCEPT_VECTOR, vec))          # cosine sim
-        scores.append((score, idx))
-
-    ranked = sorted(scores, reverse=True)[:max_picks]
-    return [idx for _, idx in ranked]
-
-
-def openai_chat(model: str, messages: List[Dict], temperature: float = 0):
-    client = openai.OpenAI()
-    resp = client.chat.completions.create(
+        if matrix is None:
+            matrix = np.empty((len(texts), vecs.shape[1]), dtype=np.float32)
+        matrix[chunk] = vecs
+    if matrix is None:
+        matrix = np.empty((0, get_concept_vector().shape[-1]), dtype=np.float32)
+    return matrix
+
+
+def embed_with_cache(papers: List[Dict], batch_size: int,
+                     store: EmbeddingStore | None,
+                     record: bool = True) -> Tuple[np.ndarray, int]:
+    """Like `encode_papers`, but only cache misses go through the model.
+
+    Returns (matrix, n_cache_hits).  New vectors are written back to *store*
+    unless *record* is False.
+    """
+    if store is None:
+        return encode_papers(papers, batch_size), 0
+
+    hashes = [content_hash(paper_text(p)) for p in papers]
+    hits = store.lookup([p["id"] for p in papers], hashes)
+    misses = [i for i in range(len(papers)) if i not in hits]
+    fresh = encode_papers([papers[i] for i in misses], batch_size)
+    if record:
+        store.put([papers[i]["id"] for i in misses], [hashes[i] for i in misses], fresh)
+        store.save()
+
+    dim = fresh.shape[1] if misses else get_concept_vector().shape[-1]
+    matrix = np.empty((len(papers), dim), dtype=np.float32)
+    if misses:
+        matrix[misses] = fresh
+    for i, vec in hits.items():
+        matrix[i] = vec
+    return matrix, len(hits)
+
+
+def score_matrix(matrix: np.ndarray, concept: np.ndarray = None) -> np.ndarray:
+    """Cosine scores of every row in *matrix* against the concept vector(s).
+
+    A 2-D *concept* (one row per concept) scores each paper by its best match.
+    """
+    concept = get_concept_vector() if concept is None else concept
+    scores = matrix @ concept.T                               # one matmul
+    return scores.max(axis=1) if scores.ndim == 2 else scores
+
+
+def top_k(scores: np.ndarray, k: int) -> List[int]:
+    """0-based indices of the *k* highest scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return []
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind="stable")].tolist()
+
+
+def top_k_unseen(scores: np.ndarray, matrix: np.ndarray, papers: List[Dict], k: int,
+                 index: PaperIndex, before: str) -> Tuple[List[int], Dict[int, Dict]]:
+    """`top_k`, skipping papers that duplicate a pick from before *before*.
+
+    Only the head of the ranking is checked; it widens until *k* survive.
+    """
+    width = k
+    while True:
+        head = top_k(scores, width)
+        dupes = index.duplicates([papers[i] for i in head], matrix[head], before)
+        dupes = {head[pos]: d for pos, d in dupes.items()}
+        kept = [i for i in head if i not in dupes]
+        if len(kept) >= k or width >= len(scores):
+            return kept[:k], dupes
+        width *= 2
+
+
+def rank_mt_papers(papers: List[Dict], max_picks: int,
+                   batch_size: int = DEFAULT_BATCH_SIZE,
+                   stats: Dict | None = None,
+                   store: EmbeddingStore | None = None,
+                   prefilter: int = 0,
+                   index: PaperIndex | None = None,
+                   date: dt.date | None = None,
+                   record: bool = True) -> List[int]:
+    """Return 1-based indices of the top *max_picks* MT-like papers.
+
+    With *prefilter* > 0 only the best BM25 papers (plus PREFILTER_MARGIN)
+    reach the dense embedder.  With a *store*, cached embeddings are reused
+    and only misses are encoded.  With an *index* (and *date*), papers already
+    sent in an earlier digest are skipped and every embedded paper is
+    recorded (the picks themselves are recorded once the digest is written).
+    *record* False leaves the store, index and concept file untouched
+    (offline replays).
+    If *stats* is given it is filled with prefilter, encoder throughput,
+    cache and dedup figures.
+    """
+    keep = list(range(len(papers)))
+    if prefilter > 0:
+        keep = lexical_candidates(papers, CONCEPTS, prefilter + PREFILTER_MARGIN)
+    dense = [papers[i] for i in keep]
+    concept = get_concept_vector(record)      # before anything else asks for it
+
+    t0 = time.perf_counter()
+    matrix, hits = embed_with_cache(dense, batch_size, store, record)
+    elapsed = time.perf_counter() - t0
+    scores = score_matrix(matrix, concept)
+    dupes: Dict[int, Dict] = {}
+    if index is None:
+        order = top_k(scores, max_picks)
+    else:
+        order, dupes = top_k_unseen(scores, matrix, dense, max_picks, index, date.isoformat())
+        if record:
+            index.add(dense, matrix, date.isoformat())
+            index.save()
+    picks = [keep[i] + 1 for i in order]
+
+    encoded = len(dense) - hits
+    rate = encoded / elapsed if elapsed > 0 else 0.0
+    print(f"⚙️  Encoded {encoded} papers in {elapsed:.1f}s ({rate:.1f} papers/s, "
+          f"batch={batch_size}, cache hits={hits}, pruned={len(papers) - len(dense)})")
+    if stats is not None:
+        stats.update({
+            "prefilter_keep": prefilter + PREFILTER_MARGIN if prefilter > 0 else None,
+            "pruned_papers": len(papers) - len(dense),
+            "encoded_papers": encoded,
+            "batch_size": batch_size,
+            "encode_seconds": round(elapsed, 3),
+            "papers_per_second": round(rate, 2),
+            "cache_hits": hits,
+            "cache_hit_ratio": round(hits / len(dense), 4) if dense else 0.0,
+            "dropped_duplicates": [
+                {"id": dense[i]["id"], "matches": d["id"], "picked_on": d["picked_on"],
+                 "score": d["score"]} for i, d in dupes.items()
+            ],
+        })
+    return picks
+
+
+def get_openai_client():
+    """One OpenAI client (and HTTP connection pool) per process; thread-safe."""
+    global _OPENAI_CLIENT
+    if _OPENAI_CLIENT is None:
+        import openai
+        _OPENAI_CLIENT = openai.OpenAI()
+    return _OPENAI_CLIENT
+
+
+def openai_chat(model: str, messages: List[Dict], temperature: float = 0,
+                cache: ResponseCache | None = None):
+    """Return (reply, usage, cache_hit).  A hit replays the stored usage."""
+    key = request_key(model, messages, temperature)
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit[0], hit[1], True
+    resp = get_openai_client().chat.completions.create(
         model=model,
         messages=messages,
         temperature=temperature,
     )
-    return resp.choices[0].message.content, resp.usage.model_dump()
+    reply, usage = resp.choices[0].message.content, resp.usage.model_dump()
+    if cache is not None:
+        cache.put(key, model, reply, usage)
+    return reply, usage, False
 
 
-# ── PREFACE (unchanged) ─────────────────────────────────────────────────
-def draft_preface(date: dt.date, papers: List[Dict], picks: List[int]):
+# ── PREFACE ──────────────────────────────────────────────────────────────
+def draft_preface(date: dt.date, papers: List[Dict], picks: List[int],
+                  cache: ResponseCache | None = None):
     chosen = [papers[i-1] for i in picks] if picks else []
     titles_block = "\n".join(f"• {p['title']}" for p in chosen) or "(no MT-specific papers today)"
 
@@ -112,85 +418,298 @@ def draft_preface(date: dt.date, papers: List[Dict], picks: List[int]):
         Selected papers (titles only):\n{titles_block}
     """).strip()
 
-    reply, usage = openai_chat(PREFACE_MODEL, [
+    reply, usage, cached = openai_chat(PREFACE_MODEL, [
         {"role": "system", "content": "You are a helpful research newsletter editor."},
         {"role": "user",   "content": user_msg},
-    ], temperature=0.7)
+    ], temperature=0.7, cache=cache)
+
+    return reply.strip(), user_msg, usage, cached
+
 
-    return reply.strip(), user_msg, usage
+def offline_preface(date: dt.date, papers: List[Dict], picks: List[int],
+                    cache: ResponseCache | None = None):
+    """Network-free stand-in for `draft_preface` (same return shape)."""
+    return (f"Here is the selection of cs.CL papers for {date.isoformat()} most "
+            "closely related to machine translation.", "(offline – no GPT call)", {}, False)
 
 
-# ── OUTPUT WRITERS (unchanged) ───────────────────────────────────────────
-def write_md(date: dt.date, preface: str, papers: List[Dict], picks: List[int]):
-    md = [preface, ""]
+# ── OUTPUT WRITERS ───────────────────────────────────────────────────────
+def render_entries(date: dt.date, papers: List[Dict], picks: List[int],
+                   index: PaperIndex | None = None) -> List[str]:
+    """Markdown lines for the picked papers – everything but the preface."""
+    md: List[str] = []
     for idx in picks:
         p = papers[idx-1]
         md += [f"## [{p['title']}]({p['url']})", "", p['abstract'], ""]
-    path = BASE_DIR / f"mt_digest_{date.isoformat()}.md"
-    path.write_text("\n".join(md), encoding="utf-8")
+        related = index.related(p["id"], before=date.isoformat()) if index else []
+        if related:
+            links = "; ".join(f"[{r['title']}]({r['url']}) ({r['picked_on']})" for r in related)
+            md += [f"*Related earlier picks:* {links}", ""]
+    return md
+
+
+def write_md(date: dt.date, preface: str, entries: List[str],
+             out_dir: pathlib.Path | None = None):
+    path = (out_dir or BASE_DIR) / f"mt_digest_{date.isoformat()}.md"
+    path.write_text("\n".join([preface, "", *entries]), encoding="utf-8")
     return path
 
 
-def write_log(date: dt.date, log: Dict):
-    path = LOG_DIR / f"mt_digest_{date.isoformat()}.log"
+def write_log(date: dt.date, log: Dict, log_dir: pathlib.Path | None = None):
+    path = (log_dir or LOG_DIR) / f"mt_digest_{date.isoformat()}.log"
     path.write_text(json.dumps(log, indent=2, ensure_ascii=False), encoding="utf-8")
     return path
 
 
 # ── MAIN ─────────────────────────────────────────────────────────────────
+def parse_date(s: str) -> dt.date:
+    return dt.datetime.strptime(s, "%Y-%m-%d").date()
+
+
 def resolve_target_date(cli_pos, cli_flag, env_var):
     if cli_pos:
-        return dt.datetime.strptime(cli_pos, "%Y-%m-%d").date()
+        return parse_date(cli_pos)
     if cli_flag:
         return cli_flag
     if env_var:
         try:
-            return dt.datetime.strptime(env_var, "%Y-%m-%d").date()
+            return parse_date(env_var)
         except ValueError:
             raise SystemExit(f"Bad DATE env-var format: {env_var} (want YYYY-MM-DD)")
     return dt.date.today() - dt.timedelta(days=1)
 
 
-def main():
-    if "OPENAI_API_KEY" not in os.environ:
-        raise SystemExit("OPENAI_API_KEY env var missing")
+def date_range(start: dt.date, end: dt.date) -> List[dt.date]:
+    if end < start:
+        raise SystemExit(f"--to {end} is before --from {start}")
+    return [start + dt.timedelta(days=n) for n in range((end - start).days + 1)]
+
+
+def start_day(target_date: dt.date, papers: List[Dict], ns,
+              store: EmbeddingStore | None, index: PaperIndex | None,
+              cache: ResponseCache | None, pool: ThreadPoolExecutor,
+              fetch_stats: Dict | None = None) -> Callable[[], Dict[str, Dict]]:
+    """Rank one fetched day and start its GPT preface on *pool*.
 
+    Returns a `finish()` callable that waits for the preface, writes the
+    markdown + log and returns the day's per-stage figures.  Everything that
+    does not need the preface (entry markdown, related picks) is rendered
+    here, and callers may do more work – e.g. the next day – before finishing.
+    """
+    timer = StageTimer()
+    timer.record("fetch_cscl", fetch_stats or {})
+    if not papers:
+        print(f"No cs.CL papers on {target_date}.")
+        return lambda: timer.stages
+
+    rank_stats: Dict = {}
+    with timer.stage("rank_mt_papers"):
+        picks = rank_mt_papers(papers, ns.max_picks, ns.batch_size,
+                               stats=rank_stats, store=store, prefilter=ns.prefilter,
+                               index=index, date=target_date, record=not ns.offline)
+    timer.record("model_init", take_model_init_stats())   # part of rank_mt_papers
+
+    make_preface = offline_preface if ns.offline else draft_preface
+
+    def timed_preface():
+        with measure() as figures:
+            result = make_preface(target_date, papers, picks, cache)
+        return result, figures
+
+    preface_job = pool.submit(timed_preface)
+    with timer.stage("write_md"):
+        entries = render_entries(target_date, papers, picks, index)
+
+    def finish() -> Dict[str, Dict]:
+        with timer.stage("preface_wait"):
+            (preface, preface_prompt, preface_usage, cached), figures = preface_job.result()
+        timer.record("draft_preface", figures)      # ran concurrently on the pool
+        # Offline replays never overwrite a real (possibly sent) digest.
+        md_dir, log_dir = (OFFLINE_DIR, OFFLINE_DIR / "logs") if ns.offline else (None, None)
+        if log_dir is not None:
+            log_dir.mkdir(parents=True, exist_ok=True)
+        with timer.stage("write_md"):
+            md_path = write_md(target_date, preface, entries, md_dir)
+        if index is not None and not ns.offline:   # offline digests are never sent
+            index.record_picks([papers[i - 1]["id"] for i in picks], target_date.isoformat())
+            index.save()
+
+        tokens = preface_usage.get("total_tokens", 0)
+        log_dict = {
+            "timestamp_utc": dt.datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "target_date": target_date.isoformat(),
+            "total_papers": len(papers),
+            "picked_indices": picks,
+            "ranking": rank_stats,
+            "stages": timer.stages,
+            "token_usage": {
+                "preface_call": preface_usage,
+                "cache_hit": cached,
+                "tokens_saved": tokens if cached else 0,
+                "grand_total": 0 if cached else tokens,
+                "approx_cost_usd": 0.0 if cached else round(tokens * USD_PER_TOKEN, 4),
+                "cost_saved_usd": round(tokens * USD_PER_TOKEN, 4) if cached else 0.0,
+            },
+            "preface_prompt_sent": preface_prompt,
+        }
+        log_path = write_log(target_date, log_dict, log_dir)
+
+        print(f"✓ Digest saved at {md_path.relative_to(BASE_DIR)}  |  "
+              f"Log → {log_path.relative_to(BASE_DIR)}")
+        return timer.stages
+
+    return finish
+
+
+def process_day(target_date: dt.date, papers: List[Dict], ns,
+                store: EmbeddingStore | None, index: PaperIndex | None,
+                cache: ResponseCache | None, pool: ThreadPoolExecutor,
+                fetch_stats: Dict | None = None) -> Dict[str, Dict]:
+    """Rank → preface → markdown + log for one day whose papers are fetched.
+
+    Returns the day's per-stage figures (also written to the log).
+    """
+    return start_day(target_date, papers, ns, store, index, cache, pool, fetch_stats)()
+
+
+def run_range(dates: List[dt.date], ns, store: EmbeddingStore | None,
+              index: PaperIndex | None, cache: ResponseCache | None,
+              pool: ThreadPoolExecutor) -> Dict[str, float]:
+    """Process *dates* in order, fetching ahead on a thread pool.
+
+    While day *n* is being embedded (CPU), days n+1 … n+prefetch are already
+    downloading (network, one day at a time – see `_stream_arxiv`) and day
+    n-1's preface is still being drafted.
+    Returns summed wall-clock per stage; `fetch_wait` is the time the main
+    thread actually blocked on arXiv, while `fetch_cscl` sums the per-day
+    fetch durations.
+    """
+    totals: Dict[str, float] = {"fetch_wait": 0.0}
+
+    def add(stages: Dict[str, Dict]) -> None:
+        for name, figures in stages.items():
+            totals[name] = totals.get(name, 0.0) + figures["wall_s"]
+
+    def timed_fetch(day: dt.date):
+        with measure() as figures:
+            papers = fetch_day(day, ns)
+        return papers, figures
+
+    finish_prev = None
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, ns.prefetch)) as fetch_pool:
+            pending = {}
+            ahead = iter(dates)
+            for day in dates:
+                while len(pending) <= ns.prefetch:
+                    nxt = next(ahead, None)
+                    if nxt is None:
+                        break
+                    pending[nxt] = fetch_pool.submit(timed_fetch, nxt)
+                t = time.perf_counter()
+                papers, fetch_stats = pending.pop(day).result()
+                totals["fetch_wait"] += time.perf_counter() - t
+                finish = start_day(day, papers, ns, store, index, cache, pool, fetch_stats)
+                done, finish_prev = finish_prev, finish
+                if done is not None:
+                    add(done())
+    finally:
+        # A later day failing must not lose the day that is already ranked.
+        if finish_prev is not None:
+            add(finish_prev())
+    return totals
+
+
+def run(ns, store: EmbeddingStore | None, index: PaperIndex | None,
+        cache: ResponseCache | None) -> None:
+    with ThreadPoolExecutor(max_workers=PREFACE_WORKERS) as pool:
+        if ns.date_from:
+            t0 = time.perf_counter()
+            totals = run_range(date_range(ns.date_from, ns.date_to), ns, store, index,
+                               cache, pool)
+            total = time.perf_counter() - t0
+            print("⏱  Stage wall-clock (s): " + "  ".join(
+                f"{k}={v:.1f}" for k, v in totals.items()) + f"  total={total:.1f}")
+            return
+
+        target_date = resolve_target_date(ns.date, ns.date_flag, os.getenv("DATE"))
+        with measure() as fetch_stats:
+            papers = fetch_day(target_date, ns)
+        process_day(target_date, papers, ns, store, index, cache, pool, fetch_stats)
+
+
+def main():
+    global EMBED_BACKEND
     ap = argparse.ArgumentParser(description="Generate daily MT-centric arXiv digest.")
     ap.add_argument("date", nargs="?", help="Target UTC date YYYY-MM-DD (positional)")
-    ap.add_argument("--date", dest="date_flag",
-                    type=lambda s: dt.datetime.strptime(s, "%Y-%m-%d").date(),
+    ap.add_argument("--date", dest="date_flag", type=parse_date,
                     help="Target UTC date (flag). Overrides env var, ignored if positional given.")
+    ap.add_argument("--from", dest="date_from", type=parse_date,
+                    help="First date of a backfill range (inclusive, needs --to).")
+    ap.add_argument("--to", dest="date_to", type=parse_date,
+                    help="Last date of a backfill range (inclusive, needs --from).")
+    ap.add_argument("--prefetch", type=int, default=DEFAULT_PREFETCH,
+                    help="Days fetched ahead in range mode (default: %(default)s).")
+    ap.add_argument("--page-size", type=int, default=PAGE_SIZE,
+                    help="arXiv results per API page (default: %(default)s).")
+    ap.add_argument("--refresh", action="store_true",
+                    help="Re-download listings even if the day is cached.")
+    ap.add_argument("--offline", action="store_true",
+                    help="Replay cached arXiv listings only and skip the GPT preface; "
+                         "the digest and log go to .cache/offline/ and no cache or "
+                         "paper-index entry is written.")
     ap.add_argument("--max", dest="max_picks", type=int, default=DEFAULT_MAX_PICKS,
                     help="Maximum papers to include (default: %(default)s).")
+    ap.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                    help="Papers per embedding batch (default: %(default)s).")
+    ap.add_argument("--prefilter", type=int, default=0, metavar="M",
+                    help="Send only the top M BM25 papers (+%d) to the dense model; "
+                         "0 disables (default)." % PREFILTER_MARGIN)
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Bypass the on-disk embedding and GPT reply caches.")
+    ap.add_argument("--no-history", action="store_true",
+                    help="Skip cross-day dedup / related picks and leave the paper index untouched.")
+    ap.add_argument("--profile", metavar="PATH", type=pathlib.Path,
+                    help="Dump cProfile stats of the main thread to PATH.")
+    ap.add_argument("--backend", choices=BACKENDS, default=EMBED_BACKEND,
+                    help="Embedding inference backend (default: %(default)s, env EMBED_BACKEND); "
+                         "onnx-int8 is experimental.")
     ns = ap.parse_args()
 
-    target_date = resolve_target_date(ns.date, ns.date_flag, os.getenv("DATE"))
-
-    papers = fetch_cscl(target_date)
-    if not papers:
-        print("No cs.CL papers on that date.")
-        return
+    if ns.batch_size < 1:
+        ap.error("--batch-size must be at least 1")
+    if ns.page_size < 1:
+        ap.error("--page-size must be at least 1")
+    if ns.prefetch < 0:
+        ap.error("--prefetch must be 0 or positive")
+    if ns.offline and ns.refresh:
+        ap.error("--offline and --refresh are mutually exclusive")
+    if ns.prefilter < 0:
+        ap.error("--prefilter must be 0 or positive")
+    if (ns.date_from is None) != (ns.date_to is None):
+        ap.error("--from and --to must be given together")
+    if ns.date_from and (ns.date or ns.date_flag):
+        ap.error("a single date cannot be combined with --from/--to")
+    if "OPENAI_API_KEY" not in os.environ and not ns.offline:
+        raise SystemExit("OPENAI_API_KEY env var missing")
 
-    picks = rank_mt_papers(papers, ns.max_picks)
-
-    preface, preface_prompt, preface_usage = draft_preface(target_date, papers, picks)
-    md_path = write_md(target_date, preface, papers, picks)
-
-    log_dict = {
-        "timestamp_utc": dt.datetime.utcnow().isoformat(timespec="seconds") + "Z",
-        "target_date": target_date.isoformat(),
-        "total_papers": len(papers),
-        "picked_indices": picks,
-        "token_usage": {
-            "preface_call": preface_usage,
-            "grand_total": preface_usage.get("total_tokens", 0),
-            "approx_cost_usd": round(preface_usage.get("total_tokens", 0) * USD_PER_TOKEN, 4),
-        },
-        "preface_prompt_sent": preface_prompt,
-    }
-    log_path = write_log(target_date, log_dict)
-
-    print(f"✓ Digest saved at {md_path.name}  |  Log → {log_path.relative_to(BASE_DIR)}")
+    EMBED_BACKEND = ns.backend
+    store = None if ns.no_cache else EmbeddingStore(CACHE_DIR, embed_namespace())
+    cache = None if ns.no_cache else ResponseCache(OPENAI_CACHE_DIR)
+    index = None if ns.no_history else PaperIndex(INDEX_DIR, embed_namespace())
+
+    profiler = None
+    if ns.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        run(ns, store, index, cache)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(ns.profile)
+            print(f"📈 cProfile stats → {ns.profile}  (python -m pstats {ns.profile})")
 
 
 if __name__ == "__main__":
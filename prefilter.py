@@ -0,0 +1,69 @@
+"""
+prefilter.py  – cheap lexical first stage for rank_mt_papers
+────────────────────────────────────────────────────────────────────────────
+Okapi BM25 over title + abstract, queried with the digest CONCEPTS plus a
+hand-kept list of MT synonyms / metric names.  Only the best-scoring papers
+go on to the dense embedder; everything else is pruned before any model
+forward pass.  Pure Python + NumPy, a few ms for a whole cs.CL day.
+"""
+from __future__ import annotations
+
+import math, re
+from collections import Counter
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+# Extra query terms on top of CONCEPTS – spellings, acronyms and metric names
+# that MT papers use but the concept prompt does not.
+SYNONYMS = [
+    "translation", "translations", "translator", "translate",
+    "MT", "NMT", "SMT", "LLM-based translation", "WMT", "FLORES",
+    "BLEU", "COMET", "chrF", "TER", "MetricX", "BLEURT", "MQM",
+    "quality estimation", "QE", "post-editing", "MTPE", "MTQE", "LQA",
+    "bilingual", "multilingual", "parallel corpus", "bitext",
+    "source language", "target language", "low-resource languages",
+    "cross-lingual", "interpreting", "simultaneous translation",
+    "speech translation", "localization", "terminology",
+]
+
+K1, B = 1.5, 0.75
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens; every ``translat*`` form folds to one term."""
+    return ["translat" if t.startswith("translat") else t
+            for t in _TOKEN.findall(text.lower())]
+
+
+def query_terms(concepts: Iterable[str]) -> List[str]:
+    return sorted({t for phrase in [*concepts, *SYNONYMS] for t in tokenize(phrase)})
+
+
+def bm25_scores(papers: List[Dict], terms: List[str]) -> np.ndarray:
+    """BM25 score of every paper's title + abstract against *terms*."""
+    docs = [Counter(tokenize(f"{p['title']} {p['abstract']}")) for p in papers]
+    n = len(docs)
+    if n == 0:
+        return np.zeros(0)
+    lengths = np.array([sum(d.values()) for d in docs], dtype=float)
+    avgdl = lengths.mean() or 1.0
+    norm = K1 * (1 - B + B * lengths / avgdl)
+    scores = np.zeros(n)
+    for term in terms:
+        tf = np.array([d.get(term, 0) for d in docs], dtype=float)
+        df = np.count_nonzero(tf)
+        if df == 0:
+            continue
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        scores += idf * tf * (K1 + 1) / (tf + norm)
+    return scores
+
+
+def lexical_candidates(papers: List[Dict], concepts: Iterable[str], keep: int) -> List[int]:
+    """0-based indices (in input order) of the *keep* best BM25 papers."""
+    if keep >= len(papers):
+        return list(range(len(papers)))
+    scores = bm25_scores(papers, query_terms(concepts))
+    return sorted(np.argpartition(-scores, keep - 1)[:keep].tolist())
@@ -0,0 +1,131 @@
+// Client-side search over the archive index written by build_archive.py.
+// Nothing is fetched until the search box is first used; after that only
+// meta.json, the term shards a query touches and the month files of the
+// top hits are loaded.  Tokenisation and shard hashing must match
+// build_archive.tokenize / build_archive.shard_of.
+
+const BASE = new URL("search/", document.currentScript.src);
+const MAX_HITS = 20;
+const cache = new Map();
+let meta = null;
+let vectors = null;
+
+function getJSON(path) {
+  if (!cache.has(path)) {
+    cache.set(path, fetch(new URL(path, BASE)).then((r) => (r.ok ? r.json() : {})));
+  }
+  return cache.get(path);
+}
+
+function fnv1a(term) {
+  let h = 0x811c9dc5;
+  for (let i = 0; i < term.length; i++) {
+    h = Math.imul(h ^ term.charCodeAt(i), 0x01000193) >>> 0;
+  }
+  return h;
+}
+
+function tokenize(text, stop) {
+  return (text.toLowerCase().match(/[a-z0-9]+/g) || [])
+    .filter((t) => t.length > 1 && !stop.has(t))
+    .map((t) => (t.startsWith("translat") ? "translat" : t));
+}
+
+async function search(query) {
+  meta = meta || (await getJSON("meta.json"));
+  const terms = [...new Set(tokenize(query, new Set(meta.stopwords)))];
+  const scores = new Map();
+  const matched = new Map();
+  await Promise.all(
+    terms.map(async (term) => {
+      const shard = String(fnv1a(term) % meta.shards).padStart(2, "0");
+      const postings = (await getJSON(`terms/${shard}.json`))[term] || [];
+      const idf = Math.log(1 + meta.docs / (postings.length || 1));
+      for (const [key, w] of postings) {
+        scores.set(key, (scores.get(key) || 0) + w * idf);
+        matched.set(key, (matched.get(key) || 0) + 1);
+      }
+    })
+  );
+  // Documents matching every term first, then by score.
+  const keys = [...scores.keys()]
+    .sort((a, b) => matched.get(b) - matched.get(a) || scores.get(b) - scores.get(a))
+    .slice(0, MAX_HITS);
+  return loadDocs(keys);
+}
+
+async function loadDocs(keys) {
+  const months = [...new Set(keys.map((k) => k.slice(0, 7)))];
+  const byMonth = Object.assign({}, ...(await Promise.all(months.map((m) => getJSON(`docs/${m}.json`)))));
+  return keys.filter((k) => byMonth[k]).map((k) => ({ key: k, ...byMonth[k] }));
+}
+
+async function similar(key) {
+  if (!vectors) {
+    const [info, buf] = await Promise.all([
+      getJSON("vectors.json"),
+      fetch(new URL("vectors.i8", BASE)).then((r) => r.arrayBuffer()),
+    ]);
+    vectors = { ...info, data: new Int8Array(buf), row: new Map(info.keys.map((k, i) => [k, i])) };
+  }
+  const { dim, data, scales, keys, row } = vectors;
+  const q = row.get(key);
+  if (q === undefined) return [];
+  const scored = keys.map((k, i) => {
+    let dot = 0;
+    for (let j = 0, a = q * dim, b = i * dim; j < dim; j++) dot += data[a + j] * data[b + j];
+    return [k, dot * scales[q] * scales[i]];
+  });
+  scored.sort((a, b) => b[1] - a[1]);
+  return loadDocs(scored.filter(([k]) => k !== key).slice(0, 10).map(([k]) => k));
+}
+
+function render(target, hits, heading) {
+  target.replaceChildren();
+  const h = document.createElement("h2");
+  h.textContent = heading;
+  target.append(h);
+  for (const doc of hits) {
+    const p = document.createElement("p");
+    // build_archive.safe_url already blanks non-http(s) URLs; never trust it blindly.
+    const a = document.createElement(/^https?:\/\//i.test(doc.u || "") ? "a" : "span");
+    if (a.tagName === "A") a.href = doc.u;
+    a.textContent = doc.t;
+    const day = document.createElement("a");
+    day.href = `${doc.d}.html`;
+    day.textContent = doc.d;
+    const snippet = document.createElement("small");
+    snippet.textContent = doc.s;
+    p.append(a, " – ", day);
+    if (meta && meta.vectors) {
+      const more = document.createElement("button");
+      more.textContent = "similar";
+      more.style.marginLeft = "0.5rem";
+      more.onclick = async () => render(target, await similar(doc.key), `Similar to “${doc.t}”`);
+      p.append(more);
+    }
+    p.append(document.createElement("br"), snippet);
+    target.append(p);
+  }
+}
+
+const input = document.getElementById("q");
+const results = document.getElementById("results");
+const digests = document.getElementById("digests");
+let pending = 0;
+input.addEventListener("input", () => {
+  const query = input.value.trim();
+  const ticket = ++pending;
+  if (!query) {
+    results.replaceChildren();
+    digests.hidden = false;
+    return;
+  }
+  setTimeout(async () => {
+    if (ticket !== pending) return;
+    const hits = await search(query);
+    if (ticket !== pending) return;
+    digests.hidden = true;
+    render(results, hits, hits.length ? `${hits.length} matching picks` : "No matches");
+  }, 150);
+});
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+response_cache.py  – content-addressed cache for chat-completion replies
+────────────────────────────────────────────────────────────────────────────
+The key is a SHA-256 of the full request (model, messages, temperature), so
+rerunning a date whose picks did not change replays the earlier preface
+instead of paying for it again.  One small JSON file per key:
+
+    <root>/<key[:2]>/<key>.json   {"created": ts, "model": …, "reply": …, "usage": {…}}
+
+Entries older than `ttl_days` are misses; `evict` drops expired entries and
+then the oldest ones until the directory fits in `max_bytes`.
+
+CLI
+---
+    python response_cache.py stats
+    python response_cache.py evict [--ttl-days N] [--max-mb N]
+"""
+from __future__ import annotations
+
+import argparse, hashlib, json, os, pathlib, time
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_ROOT = pathlib.Path(__file__).parent / ".cache" / "openai"
+DEFAULT_TTL_DAYS = 30
+DEFAULT_MAX_BYTES = 20 * 2**20
+
+
+def request_key(model: str, messages: List[Dict], temperature: float) -> str:
+    blob = json.dumps({"model": model, "messages": messages, "temperature": temperature},
+                      sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, root: pathlib.Path = DEFAULT_ROOT, ttl_days: float = DEFAULT_TTL_DAYS,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = pathlib.Path(root)
+        self.ttl_s = ttl_days * 86400
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Tuple[str, Dict]]:
+        """(reply, usage) for a live entry, else None."""
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry["created"] > self.ttl_s:
+            return None
+        return entry["reply"], entry["usage"]
+
+    def put(self, key: str, model: str, reply: str, usage: Dict) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"created": time.time(), "model": model,
+                                   "reply": reply, "usage": usage}, ensure_ascii=False),
+                       encoding="utf-8")
+        os.replace(tmp, path)
+        self.evict()
+
+    def _files(self) -> List[Tuple[float, int, pathlib.Path]]:
+        out = []
+        for p in self.root.glob("*/*.json"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:              # evicted by a concurrent put()
+                continue
+            out.append((st.st_mtime, st.st_size, p))
+        return sorted(out)
+
+    def evict(self) -> int:
+        """Drop expired entries, then oldest-first until under max_bytes."""
+        files, removed = self._files(), 0
+        cutoff = time.time() - self.ttl_s
+        total = sum(size for _, size, _ in files)
+        for mtime, size, path in files:
+            if mtime >= cutoff and total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description="Inspect or evict the GPT response cache.")
+    ap.add_argument("--root", type=pathlib.Path, default=DEFAULT_ROOT,
+                    help="Cache directory (default: %(default)s).")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("stats", help="Print entry count and size.")
+    ep = sub.add_parser("evict", help="Drop expired / surplus entries.")
+    ep.add_argument("--ttl-days", type=float, default=DEFAULT_TTL_DAYS)
+    ep.add_argument("--max-mb", type=float, default=DEFAULT_MAX_BYTES / 2**20)
+    ns = ap.parse_args()
+
+    if ns.cmd == "stats":
+        files = ResponseCache(ns.root)._files()
+        print(f"{ns.root}: {len(files)} replies, {sum(s for _, s, _ in files) / 1024:.1f} KiB")
+    else:
+        cache = ResponseCache(ns.root, ns.ttl_days, int(ns.max_mb * 2**20))
+        print(f"✓ Evicted {cache.evict()} replies")
+
+
+if __name__ == "__main__":
+    main()
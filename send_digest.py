@@ -1,125 +1,251 @@
 #!/usr/bin/env python3
 """
-send_digest.py <digest_markdown_file>
+send_digest.py <digest_markdown_file> [<digest_markdown_file> …]
 
-Sends a markdown digest generated by **mt_arxiv_digest.py** to Buttondown.
+Sends markdown digests generated by **mt_arxiv_digest.py** to Buttondown.
 
-Flow
-----
-1. Read the markdown file passed on the command‑line.
+Flow (per file)
+---------------
+1. Hash subject + markdown and look the digest up in the local state file
+   (`logs/buttondown_state.json`).  Already sent → skip without any API call;
+   draft already created → go straight to step 3.
 2. Create a draft e‑mail in Buttondown.  If Buttondown replies
-   `email_duplicate`, look up the existing draft and re‑use its `id`.
+   `email_duplicate`, look up the existing e‑mail and re‑use its `id`.
 3. Call `/send‑draft` to deliver the message to *all* active subscribers.
-   If the draft was already sent earlier, exit 0 so CI remains green.
+   If the draft was already sent earlier, treat it as success so CI stays green.
+
+All calls share one pooled `requests.Session`; 429 / 5xx replies,
+connection errors and timeouts are retried with exponential backoff
+(honouring `Retry-After`).  Several files can be passed at once for backfills.
 
 Environment
 -----------
-* **BUTTONDOWN_TOKEN** – API token from your Buttondown account.
+* **BUTTONDOWN_TOKEN** – API token from your Buttondown account.
+* **BUTTONDOWN_API**   – API base URL (default: the real service; point it at
+  `mock_buttondown.py` to exercise retries and idempotency offline).
 
 Exit status is non‑zero only on unexpected HTTP failures so your GitHub
 Actions job will mark a true error.
 """
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import pathlib
 import sys
 import time
-import urllib.parse
 from datetime import datetime, timezone
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 
-BTN_API = "https://api.buttondown.email/v1"
+BTN_API = os.getenv("BUTTONDOWN_API", "https://api.buttondown.email/v1")
 TIMEOUT = 30  # seconds for all HTTP calls
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 5
+BACKOFF_S = 1.0  # first retry delay, doubles each attempt
+STATE_PATH = pathlib.Path(__file__).parent / "logs" / "buttondown_state.json"
+
+
+class SendError(Exception):
+    """Unexpected Buttondown reply – the digest was not delivered."""
 
 
 def bail(msg: str) -> None:
-    """Print *msg* in red and terminate with exit 1."""
+    """Print *msg* in red and terminate with exit 1."""
     print(f"\033[91m{msg}\033[0m", file=sys.stderr)
     sys.exit(1)
 
 
 # ---------------------------------------------------------------------------
-# 0⃣  CLI + env‑var checks
+# HTTP client
 # ---------------------------------------------------------------------------
-if len(sys.argv) != 2:
-    bail("Usage: python send_digest.py mt_digest_YYYY-MM-DD.md")
+class ButtondownClient:
+    def __init__(self, token: str, api: str = BTN_API, max_retries: int = MAX_RETRIES,
+                 backoff: float = BACKOFF_S, sleep: Callable[[float], None] = time.sleep,
+                 timeout: float = TIMEOUT):
+        self.api = api.rstrip("/")
+        self.max_retries, self.backoff, self.sleep = max_retries, backoff, sleep
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Token {token}",
+            "Content-Type": "application/json",
+        })
+
+    def request(self, method: str, path: str, **kw) -> requests.Response:
+        """Send one request, retrying 429 / 5xx / connection errors / timeouts.
+
+        A retried POST may already have taken effect; the callers' duplicate
+        handling (`email_duplicate`) makes that safe.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                resp = self.session.request(method, f"{self.api}{path}",
+                                            timeout=self.timeout, **kw)
+            except requests.RequestException as exc:
+                if attempt == self.max_retries:
+                    raise SendError(f"{method} {path} failed: {exc}") from exc
+                reason, retry_after = type(exc).__name__, None
+            else:
+                if resp.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    return resp
+                reason, retry_after = str(resp.status_code), resp.headers.get("Retry-After")
+            wait = self.backoff * 2 ** attempt
+            if retry_after and retry_after.isdigit():
+                wait = max(wait, float(retry_after))
+            print(f"↻  {method} {path} → {reason}; retry {attempt + 1}/{self.max_retries} in {wait:.1f}s")
+            self.sleep(wait)
+        raise AssertionError("unreachable")
+
+    def create_draft(self, subject: str, body: str) -> str:
+        payload: Dict[str, Any] = {
+            "subject": subject,
+            "body": body,
+            "markdown": True,
+            "publish_url": False,
+        }
+        resp = self.request("POST", "/emails", data=json.dumps(payload))
+        if resp.ok:
+            email_id = resp.json()["id"]
+            print("✓ Draft created:", email_id)
+            return email_id
+        err = _json(resp)
+        if err.get("code") != "email_duplicate":
+            raise SendError(f"Draft upload failed → {resp.status_code}: {err or resp.text}")
+        print("ℹ️  E‑mail already exists – fetching its ID")
+        email_id = self.find_email(subject)
+        if email_id is None:
+            raise SendError("Duplicate reported but existing e‑mail not found – aborting")
+        print("✓ Re‑using e‑mail:", email_id)
+        return email_id
+
+    def find_email(self, subject: str, attempts: int = 3) -> Optional[str]:
+        """Search e‑mails (drafts and sent) for exactly *subject*; polls
+        briefly for eventual consistency.  A sent match makes `send_draft` a
+        no-op, so a merely similar subject must never be returned."""
+        for attempt in range(attempts):
+            resp = self.request("GET", "/emails", params={"search": subject})
+            if not resp.ok:
+                raise SendError(f"Draft search failed → {resp.status_code}: {resp.text}")
+            exact = [e for e in resp.json().get("results", []) if e.get("subject") == subject]
+            if exact:
+                return exact[0]["id"]
+            if attempt + 1 < attempts:
+                self.sleep(self.backoff * 2 ** attempt)
+        return None
+
+    def send_draft(self, email_id: str) -> bool:
+        """Deliver the draft.  Returns False if it had already been sent."""
+        resp = self.request("POST", f"/emails/{email_id}/send-draft",
+                            data=json.dumps({}))  # empty body → full subscriber list
+        if resp.ok:
+            return True
+        if resp.status_code == 400 and _json(resp).get("code") == "email_duplicate":
+            return False
+        raise SendError(f"Send failed → {resp.status_code}: {resp.text}")
+
+
+def _json(resp: requests.Response) -> Dict:
+    try:
+        body = resp.json()
+    except ValueError:
+        return {}
+    return body if isinstance(body, dict) else {}
 
-md_path = pathlib.Path(sys.argv[1]).resolve()
-if not md_path.exists():
-    bail(f"File not found: {md_path}")
 
-TOKEN = os.getenv("BUTTONDOWN_TOKEN")
-if not TOKEN:
-    bail("Env var BUTTONDOWN_TOKEN is missing")
+# ---------------------------------------------------------------------------
+# Local send state (digest hash → email id + status)
+# ---------------------------------------------------------------------------
+class SendState:
+    def __init__(self, path: pathlib.Path = STATE_PATH):
+        self.path = path
+        self.entries: Dict[str, Dict] = (
+            json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+        )
 
-subject_date = md_path.stem[-10:]  # YYYY-MM-DD at end of filename
-try:
-    pretty_date = datetime.strptime(subject_date, "%Y-%m-%d").strftime("%b %d %Y")
-except ValueError:
-    pretty_date = subject_date  # fallback, but should never happen
+    def get(self, digest_hash: str) -> Dict:
+        return self.entries.get(digest_hash, {})
 
-subject = f"Machine-Translation Digest — {pretty_date}"
+    def update(self, digest_hash: str, **fields) -> None:
+        entry = self.entries.setdefault(digest_hash, {})
+        entry.update(fields, updated=datetime.now(timezone.utc).isoformat(timespec="seconds"))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.entries, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
 
-headers: Dict[str, str] = {
-    "Authorization": f"Token {TOKEN}",
-    "Content-Type": "application/json",
-}
 
 # ---------------------------------------------------------------------------
-# 1⃣  Create draft (or reuse existing duplicate)
+# Sending
 # ---------------------------------------------------------------------------
-print("⏳ Uploading draft…")
-
-payload: Dict[str, Any] = {
-    "subject": subject,
-    "body": md_path.read_text(encoding="utf-8"),
-    "markdown": True,
-    "publish_url": False,
-}
-
-resp = requests.post(f"{BTN_API}/emails", headers=headers, data=json.dumps(payload), timeout=TIMEOUT)
-
-if resp.ok:
-    email_id = resp.json()["id"]
-    print("✓ Draft created:", email_id)
-else:
-    err = resp.json()
-    if err.get("code") == "email_duplicate":
-        print("ℹ️  Draft already exists – fetching its ID")
-        q = urllib.parse.quote_plus(subject)
-        time.sleep(1)  # brief pause avoids immediate eventual‑consistency issue
-        drafts = requests.get(
-            f"{BTN_API}/emails?state=draft&search={q}", headers=headers, timeout=TIMEOUT
-        )
-        drafts.raise_for_status()
-        try:
-            email_id = drafts.json()["results"][0]["id"]
-            print("✓ Re‑using draft:", email_id)
-        except (IndexError, KeyError):
-            bail("Duplicate reported but existing draft not found – aborting")
+def digest_subject(md_path: pathlib.Path) -> str:
+    subject_date = md_path.stem[-10:]  # YYYY-MM-DD at end of filename
+    try:
+        pretty_date = datetime.strptime(subject_date, "%Y-%m-%d").strftime("%b %d %Y")
+    except ValueError:
+        pretty_date = subject_date  # fallback, but should never happen
+    return f"Machine-Translation Digest — {pretty_date}"
+
+
+def send_digest(client: ButtondownClient, state: SendState, md_path: pathlib.Path) -> str:
+    """Create + send one digest.  Returns "sent", "already_sent" or "skipped"."""
+    body = md_path.read_text(encoding="utf-8")
+    subject = digest_subject(md_path)
+    digest_hash = hashlib.sha256(f"{subject}\n{body}".encode("utf-8")).hexdigest()
+    entry = state.get(digest_hash)
+    if entry.get("status") == "sent":
+        print(f"ℹ️  {md_path.name} already sent as {entry['email_id']} – skipping")
+        return "skipped"
+
+    email_id = entry.get("email_id")
+    if email_id is None:
+        print(f"⏳ Uploading draft for {md_path.name}…")
+        email_id = client.create_draft(subject, body)
+        state.update(digest_hash, file=md_path.name, email_id=email_id, status="draft")
     else:
-        bail(f"Draft upload failed → {err}")
-
-# ---------------------------------------------------------------------------
-# 2⃣  Send draft
-# ---------------------------------------------------------------------------
-print("⏳ Sending to subscribers…")
-
-send_resp = requests.post(
-    f"{BTN_API}/emails/{email_id}/send-draft",
-    headers=headers,
-    data=json.dumps({}),  # empty body → full subscriber list
-    timeout=TIMEOUT,
-)
-
-if send_resp.ok:
-    print("✅ Sent at", datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC"))
-elif send_resp.status_code == 400 and send_resp.json().get("code") == "email_duplicate":
+        print(f"ℹ️  Re‑using recorded draft {email_id} for {md_path.name}")
+
+    print("⏳ Sending to subscribers…")
+    delivered = client.send_draft(email_id)
+    state.update(digest_hash, file=md_path.name, email_id=email_id, status="sent")
+    if delivered:
+        print("✅ Sent at", datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC"))
+        return "sent"
     print("ℹ️  Email already sent earlier – nothing to do")
-    sys.exit(0)
-else:
-    bail(f"Send failed → {send_resp.status_code}: {send_resp.text}")
\ No newline at end of file
+    return "already_sent"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        bail("Usage: python send_digest.py mt_digest_YYYY-MM-DD.md [more.md …]")
+
+    paths = [pathlib.Path(a).resolve() for a in argv]
+    missing = [str(p) for p in paths if not p.exists()]
+    if missing:
+        bail(f"File not found: {', '.join(missing)}")
+
+    token = os.getenv("BUTTONDOWN_TOKEN")
+    if not token:
+        bail("Env var BUTTONDOWN_TOKEN is missing")
+
+    client, state = ButtondownClient(token), SendState()
+    failed = []
+    for path in paths:
+        try:
+            send_digest(client, state, path)
+        except SendError as exc:
+            print(f"\033[91m{path.name}: {exc}\033[0m", file=sys.stderr)
+            failed.append(path.name)
+    if failed:
+        bail(f"{len(failed)}/{len(paths)} digest(s) failed: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+stage_timer.py  – per-stage wall / CPU / peak-RSS accounting
+────────────────────────────────────────────────────────────────────────────
+    timer = StageTimer()
+    with timer.stage("rank_mt_papers"):
+        ...
+    log["stages"] = timer.stages
+
+Each stage records
+  wall_s         perf_counter delta
+  cpu_s          process CPU delta – includes every thread, so torch's
+                 intra-op pool counts, and so do prefetch threads running
+                 at the same time in --from/--to mode
+  peak_rss_mb    process high-water mark when the stage ended
+  rss_growth_mb  how much this stage raised that high-water mark
+Repeated stage names accumulate.
+"""
+from __future__ import annotations
+
+import resource, sys, time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+# ru_maxrss is KiB on Linux, bytes on macOS
+_RSS_TO_MB = 1 / 2**20 if sys.platform == "darwin" else 1 / 1024
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _RSS_TO_MB
+
+
+@contextmanager
+def measure() -> Iterator[Dict[str, float]]:
+    """Yield a dict that is filled with the block's figures when it exits."""
+    out: Dict[str, float] = {}
+    w0, c0, r0 = time.perf_counter(), time.process_time(), peak_rss_mb()
+    try:
+        yield out
+    finally:
+        r1 = peak_rss_mb()
+        out.update({
+            "wall_s": round(time.perf_counter() - w0, 4),
+            "cpu_s": round(time.process_time() - c0, 4),
+            "peak_rss_mb": round(r1, 1),
+            "rss_growth_mb": round(r1 - r0, 1),
+        })
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def record(self, name: str, figures: Dict[str, float]) -> None:
+        if not figures:
+            return
+        prev = self.stages.get(name)
+        if prev is None:
+            self.stages[name] = dict(figures)
+            return
+        for key in ("wall_s", "cpu_s", "rss_growth_mb"):
+            prev[key] = round(prev[key] + figures[key], 4)
+        prev["peak_rss_mb"] = max(prev["peak_rss_mb"], figures["peak_rss_mb"])
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        with measure() as figures:
+            yield
+        self.record(name, figures)
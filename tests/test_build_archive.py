@@ -0,0 +1,96 @@
+"""
+Incremental bookkeeping of build_archive.py: every sequence of add / edit /
+remove builds must leave the same search index as a --full rebuild.
+"""
+import json
+import pathlib
+import sys
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+import build_archive as b
+
+
+def digest(*papers):
+    blocks = ["Preface."]
+    for title, abstract in papers:
+        slug = title.lower().replace(" ", "-")
+        blocks += [f"## [{title}](http://arxiv.org/abs/{slug})", abstract]
+    return "\n\n".join(blocks) + "\n"
+
+
+def write(src, date, *papers):
+    (src / f"mt_digest_{date}.md").write_text(digest(*papers), encoding="utf-8")
+
+
+def snapshot(out):
+    """Every generated file except the (build-order dependent) manifest."""
+    return {str(p.relative_to(out)): p.read_text(encoding="utf-8")
+            for p in sorted(out.rglob("*")) if p.is_file() and p.name != ".build-manifest.json"}
+
+
+def search(out, term):
+    shard = out / "search" / "terms" / f"{b.shard_of(term):02d}.json"
+    postings = json.loads(shard.read_text()) if shard.exists() else {}
+    return sorted(key for key, _ in postings.get(term, []))
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    src, out = tmp_path / "src", tmp_path / "out"
+    src.mkdir()
+    return src, out
+
+
+def test_add_edit_remove_match_full_rebuild(dirs, tmp_path):
+    src, out = dirs
+    write(src, "2025-05-22", ("Zebra translation", "Low-resource zebra corpora."))
+    write(src, "2025-06-01", ("Quagga metrics", "A quagga of BLEU variants."))
+    assert b.build(src, out)["rebuilt"] == 2
+    assert search(out, "quagga") == ["2025-06-01:0"]
+
+    assert b.build(src, out)["rebuilt"] == 0                 # nothing changed
+
+    write(src, "2025-06-01", ("Okapi metrics", "Okapi replaces the quagga."),
+          ("Second okapi", "More okapi."))
+    stats = b.build(src, out)
+    assert (stats["rebuilt"], stats["docs"]) == (1, 3)
+    assert search(out, "okapi") == ["2025-06-01:0", "2025-06-01:1"]
+    assert search(out, "quagga") == ["2025-06-01:0"]         # still in the new abstract
+
+    (src / "mt_digest_2025-05-22.md").unlink()
+    assert b.build(src, out)["removed"] == 1
+    assert search(out, "zebra") == []
+    assert not (out / "2025-05-22.html").exists()
+    assert not (out / "search" / "docs" / "2025-05.json").exists()
+
+    full = tmp_path / "full"
+    b.build(src, full, full=True)
+    assert snapshot(out) == snapshot(full)
+
+
+def test_full_rebuild_drops_deleted_digests(dirs):
+    src, out = dirs
+    write(src, "2025-05-22", ("Zebra translation", "Zebra."))
+    write(src, "2025-06-01", ("Quagga metrics", "Quagga."))
+    b.build(src, out)
+    b.build(src, out)
+    (src / "mt_digest_2025-06-01.md").unlink()
+
+    b.build(src, out, full=True)
+    assert search(out, "quagga") == []
+    assert not (out / "2025-06-01.html").exists()
+    assert not (out / "search" / "docs" / "2025-06.json").exists()
+    assert json.loads((out / "search" / "meta.json").read_text())["docs"] == 1
+
+
+def test_only_http_urls_are_linked(dirs):
+    src, out = dirs
+    (src / "mt_digest_2025-05-22.md").write_text(
+        "See [this](javascript:evil).\n\n## [Evil](javascript:evil)\n\nAbstract.\n\n"
+        "## [Good](https://arxiv.org/abs/2505.00001)\n\nAbstract.\n", encoding="utf-8")
+    b.build(src, out)
+    docs = json.loads((out / "search" / "docs" / "2025-05.json").read_text())
+    assert [docs[k]["u"] for k in sorted(docs)] == ["", "https://arxiv.org/abs/2505.00001"]
+    assert "javascript:" not in (out / "2025-05-22.html").read_text()
@@ -0,0 +1,105 @@
+"""
+Retry and idempotency paths of send_digest.py, run against mock_buttondown.py.
+"""
+import pathlib
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+import mock_buttondown
+from send_digest import (ButtondownClient, SendError, SendState, digest_subject,
+                         send_digest)
+
+
+@pytest.fixture
+def mock():
+    servers = []
+
+    def start(**faults):
+        server = mock_buttondown.serve(0, **faults)
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+@pytest.fixture
+def digest(tmp_path):
+    path = tmp_path / "mt_digest_2025-05-22.md"
+    path.write_text("Preface.\n\n## [A paper](http://arxiv.org/abs/2505.00001v1)\n\nAbstract.\n",
+                    encoding="utf-8")
+    return path
+
+
+def make_client(base: str, sleeps: list, **kw) -> ButtondownClient:
+    return ButtondownClient("test-token", f"{base}/v1", sleep=sleeps.append, **kw)
+
+
+def calls(base: str) -> dict:
+    return requests.get(f"{base}/_stats", timeout=5).json()
+
+
+def test_retries_then_rerun_is_skipped(mock, digest, tmp_path):
+    base, sleeps = mock(fail_first=2, status=503), []
+    state = SendState(tmp_path / "state.json")
+
+    assert send_digest(make_client(base, sleeps), state, digest) == "sent"
+    assert calls(base) == {"POST /emails": 3, "POST /emails/send-draft": 3}
+    assert sleeps == [1.0, 2.0, 1.0, 2.0]           # two backoffs per endpoint
+
+    # A rerun (fresh client, state reloaded from disk) never reaches the API.
+    rerun = SendState(tmp_path / "state.json")
+    assert send_digest(make_client(base, sleeps), rerun, digest) == "skipped"
+    assert calls(base) == {"POST /emails": 3, "POST /emails/send-draft": 3}
+
+
+def test_retry_after_is_honoured(mock, digest, tmp_path):
+    base, sleeps = mock(fail_first=1, status=429, retry_after=7), []
+    assert send_digest(make_client(base, sleeps), SendState(tmp_path / "s.json"), digest) == "sent"
+    assert sleeps == [7.0, 7.0]
+
+
+def test_lost_state_file_finds_the_sent_email(mock, digest, tmp_path):
+    base, sleeps = mock(), []
+    assert send_digest(make_client(base, sleeps), SendState(tmp_path / "a.json"), digest) == "sent"
+
+    # Same digest, empty state: the draft is a duplicate, the lookup finds
+    # the already-sent e-mail and sending is a no-op.
+    fresh = SendState(tmp_path / "b.json")
+    assert send_digest(make_client(base, sleeps), fresh, digest) == "already_sent"
+    assert calls(base) == {"POST /emails": 2, "GET /emails": 1, "POST /emails/send-draft": 2}
+    assert list(fresh.entries.values())[0]["status"] == "sent"
+
+
+def test_lookup_ignores_similar_subjects(mock, digest):
+    base, sleeps = mock(), []
+    client = make_client(base, sleeps)
+    subject = digest_subject(digest)
+    client.send_draft(client.create_draft(f"{subject} (resend)", "old body"))
+
+    assert client.find_email(subject) is None
+    assert sleeps == [1.0, 2.0]                      # polled, then gave up
+
+
+def test_timeouts_are_retried(mock, digest, tmp_path):
+    # The mock acts on the first request to every endpoint but answers too
+    # late; the retries then run into the duplicate handling.
+    base, sleeps = mock(slow_first=1, delay=1.0), []
+    state = SendState(tmp_path / "s.json")
+    client = make_client(base, sleeps, timeout=0.2)
+    assert send_digest(client, state, digest) == "already_sent"
+    assert list(state.entries.values())[0]["status"] == "sent"
+    assert calls(base) == {"POST /emails": 2, "GET /emails": 2, "POST /emails/send-draft": 2}
+    assert sleeps == [1.0, 1.0, 1.0]
+
+
+def test_persistent_timeouts_raise_send_error(mock, digest, tmp_path):
+    base, sleeps = mock(slow_first=10, delay=1.0), []
+    client = make_client(base, sleeps, timeout=0.1, max_retries=2)
+    with pytest.raises(SendError, match="POST /emails failed"):
+        send_digest(client, SendState(tmp_path / "s.json"), digest)
+    assert sleeps == [1.0, 2.0]
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+vector_index.py  – history of every paper the digest has embedded
+────────────────────────────────────────────────────────────────────────────
+One row per version-less arXiv id, with title / url / first-seen date and
+the date it was first picked (if ever).  Used by mt_arxiv_digest.py to
+
+  * drop candidates that duplicate a paper already sent in a past digest
+  * add a "related earlier picks" line under each entry
+
+Rows stay on disk as float16.  Dedup and "related" lookups – the only
+searches the digest makes – compare against past picks (a few per day), read
+just those rows and are always exact.  Only an exhaustive scan loads the
+float32 matrix (once).  For ad-hoc searches over the whole index there is an
+optional inverted-file index: `python vector_index.py train` fits spherical
+k-means centroids, after which unrestricted searches over ≥ IVF_MIN_ROWS rows
+scan only the `nprobe` nearest lists.  New rows join their nearest list as
+they are added; nothing is ever retrained automatically.
+
+Layout (one directory per embedding namespace):
+
+    <root>/<slug>/vectors.f16    raw float16 rows, append-only
+    <root>/<slug>/meta.json      {"dim": D, "rows": [...], "ivf_trained_rows": N}
+    <root>/<slug>/centroids.npy  IVF centroids (when trained)
+    <root>/<slug>/assign.npy     IVF list id of every row
+
+CLI
+---
+    python vector_index.py stats
+    python vector_index.py train [--nlist N]
+"""
+from __future__ import annotations
+
+import argparse, json, math, os, pathlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from embed_store import DEFAULT_MODEL, base_id, model_slug
+
+DEFAULT_ROOT = pathlib.Path(__file__).parent / ".cache" / "index"
+IVF_MIN_ROWS = 20_000          # below this, exact search is already fast
+DEFAULT_NPROBE = 8
+DUP_THRESHOLD = 0.97           # cosine ≥ this to a past pick → near-duplicate
+RELATED_THRESHOLD = 0.88       # cosine ≥ this → listed as related
+RELATED_K = 2
+TAKE_MAX_ROWS = 4_096          # up to this many rows are read directly, not mapped
+
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+def _exact(queries: np.ndarray, k: int, cand: np.ndarray,
+           vecs: np.ndarray) -> List[List[Tuple[float, int]]]:
+    """Top-*k* (score, row) per query over rows *cand* with vectors *vecs*."""
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    return [[(float(s[j]), int(cand[j])) for j in _top(s, k)] for s in queries @ vecs.T]
+
+
+def spherical_kmeans(x: np.ndarray, nlist: int, iters: int = 10,
+                     sample: int = 64, seed: int = 0) -> np.ndarray:
+    """Unit-norm centroids trained on ≤ nlist*sample random rows of *x*."""
+    rng = np.random.default_rng(seed)
+    pick = np.sort(rng.choice(len(x), min(len(x), nlist * sample), replace=False))
+    pts = np.asarray(x[pick], dtype=np.float32)
+    cent = pts[rng.choice(len(pts), nlist, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(pts @ cent.T, axis=1)
+        sums = np.zeros_like(cent)
+        np.add.at(sums, assign, pts)
+        filled = np.bincount(assign, minlength=nlist) > 0
+        cent[filled] = sums[filled]
+        cent /= np.linalg.norm(cent, axis=1, keepdims=True).clip(min=1e-12)
+    return cent
+
+
+def _truncate_to(path: pathlib.Path, size: int) -> None:
+    """Drop rows appended by a run that died before its metadata was saved."""
+    if path.exists() and path.stat().st_size > size:
+        os.truncate(path, size)
+
+
+class PaperIndex:
+    def __init__(self, root: pathlib.Path, namespace: str, nprobe: int = DEFAULT_NPROBE):
+        self.dir = pathlib.Path(root) / model_slug(namespace)     # created on first write
+        self.nprobe = nprobe
+        self.vec_path = self.dir / "vectors.f16"
+        self.meta_path = self.dir / "meta.json"
+        meta = (json.loads(self.meta_path.read_text(encoding="utf-8"))
+                if self.meta_path.exists() else {"dim": None, "rows": []})
+        self.dim: Optional[int] = meta["dim"]
+        self.rows: List[Dict] = meta["rows"]
+        self.ivf_trained_rows: int = meta.get("ivf_trained_rows", 0)
+        self.row_of = {r["id"]: i for i, r in enumerate(self.rows)}
+        self.picked = {i: r["picked_on"] for i, r in enumerate(self.rows) if r["picked_on"]}
+        self._vectors: Optional[np.ndarray] = None
+        self._dense: Optional[np.ndarray] = None
+        self.centroids: Optional[np.ndarray] = None
+        self.assign: Optional[np.ndarray] = None
+        self._lists_cache: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._past: Optional[Tuple[str, np.ndarray, np.ndarray]] = None
+        if self.ivf_trained_rows:
+            self.centroids = np.load(self.dir / "centroids.npy")
+            self.assign = np.load(self.dir / "assign.npy")
+            if len(self.assign) < len(self.rows):     # rows of a run that died unsaved
+                tail = self._nearest_list(self.vectors[len(self.assign):])
+                self.assign = np.concatenate([self.assign, tail])
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """float16 rows, memory-mapped: indexing reads only the rows it touches."""
+        if self._vectors is None:
+            shape = (len(self.rows), self.dim or 0)
+            self._vectors = (np.memmap(self.vec_path, dtype=np.float16, mode="r", shape=shape)
+                             if self.rows else np.empty(shape, dtype=np.float16))
+        return self._vectors
+
+    def take(self, rows) -> np.ndarray:
+        """float32 copy of *rows*.  Small sets are read row by row, so looking
+        at a few picks does not page in the whole file."""
+        rows = np.asarray(rows, dtype=np.int64).reshape(-1)
+        if self._dense is not None:
+            return self._dense[rows]
+        if len(rows) > TAKE_MAX_ROWS:
+            return np.asarray(self.vectors[rows], dtype=np.float32)
+        width = self.dim * 2
+        out = np.empty((len(rows), self.dim), dtype=np.float32)
+        with open(self.vec_path, "rb", buffering=0) as fh:
+            for i, r in enumerate(rows):
+                fh.seek(int(r) * width)
+                out[i] = np.frombuffer(fh.read(width), dtype=np.float16)
+        return out
+
+    def dense(self) -> np.ndarray:
+        """Every row as float32, loaded once – only exhaustive scans need it."""
+        if self._dense is None:
+            self._dense = np.asarray(self.vectors, dtype=np.float32)
+        return self._dense
+
+    # ── writes ───────────────────────────────────────────────────────────
+    def add(self, papers: List[Dict], matrix: np.ndarray, date: str) -> None:
+        """Record *papers* (rows of *matrix*) seen on *date*.  Known ids keep
+        their row, so revisions are not re-added."""
+        new_pos = []
+        for pos, p in enumerate(papers):
+            pid = base_id(p["id"])
+            row = self.row_of.get(pid)
+            if row is None:
+                row = len(self.rows)
+                self.row_of[pid] = row
+                new_pos.append(pos)
+                self.rows.append({"id": pid, "title": p["title"], "url": p["url"],
+                                  "seen": date, "picked_on": None})
+            meta = self.rows[row]
+            meta["seen"] = min(meta["seen"], date)
+        if not new_pos:
+            return
+        fresh = np.asarray(matrix[new_pos], dtype=np.float32)
+        if self.dim is None:
+            self.dim = int(fresh.shape[1])
+        self._vectors = None                       # re-mapped at the new length
+        self.dir.mkdir(parents=True, exist_ok=True)
+        _truncate_to(self.vec_path, (len(self.rows) - len(new_pos)) * self.dim * 2)
+        with open(self.vec_path, "ab") as fh:
+            fh.write(fresh.astype(np.float16).tobytes())
+        if self._dense is not None:
+            self._dense = np.vstack([self._dense, fresh])
+        if self.assign is not None:
+            self.assign = np.concatenate([self.assign, self._nearest_list(fresh)])
+
+    def record_picks(self, ids: Iterable[str], date: str) -> None:
+        """Mark *ids* as sent in the digest of *date*, replacing whatever an
+        earlier run of the same date recorded.  Ids must already be added."""
+        rows = {self.row_of[base_id(i)] for i in ids}
+        self._past = None
+        for row, picked_on in list(self.picked.items()):
+            if picked_on == date and row not in rows:
+                self.rows[row]["picked_on"] = None
+                del self.picked[row]
+        for row in rows:
+            meta = self.rows[row]
+            if meta["picked_on"] is None or date < meta["picked_on"]:
+                meta["picked_on"] = self.picked[row] = date
+
+    def train(self, nlist: int = 0) -> None:
+        """Fit IVF centroids (default √rows lists) and assign every row.
+        Only unrestricted searches over ≥ IVF_MIN_ROWS rows use them."""
+        n = len(self.rows)
+        if n == 0:
+            return
+        nlist = min(n, nlist or max(1, int(math.sqrt(n))))
+        self.centroids = spherical_kmeans(self.vectors, nlist)
+        self.assign = self._nearest_list(self.vectors)
+        self._lists_cache = None
+        self.ivf_trained_rows = n
+
+    def _nearest_list(self, x: np.ndarray, chunk: int = 8192) -> np.ndarray:
+        if len(x) == 0:
+            return np.empty(0, dtype=np.int32)
+        return np.concatenate([np.argmax(x[i:i + chunk] @ self.centroids.T, axis=1)
+                               for i in range(0, len(x), chunk)]).astype(np.int32)
+
+    def save(self) -> None:
+        meta = {"dim": self.dim, "rows": self.rows, "ivf_trained_rows": self.ivf_trained_rows}
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.meta_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(meta, ensure_ascii=False, separators=(",", ":")),
+                       encoding="utf-8")
+        os.replace(tmp, self.meta_path)
+        if self.centroids is not None:
+            np.save(self.dir / "centroids.npy", self.centroids)
+            np.save(self.dir / "assign.npy", self.assign)
+
+    # ── reads ────────────────────────────────────────────────────────────
+    def search(self, queries: np.ndarray, k: int,
+               rows: Optional[np.ndarray] = None) -> List[List[Tuple[float, int]]]:
+        """Top-*k* (score, row) per query, optionally restricted to *rows*.
+
+        IVF is used only once trained and only for large candidate sets;
+        small subsets such as "past picks" are always scanned exactly.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        n_cand = len(self.rows) if rows is None else len(rows)
+        if n_cand == 0:
+            return [[] for _ in queries]
+        use_ivf = self.centroids is not None and n_cand >= IVF_MIN_ROWS
+        if not use_ivf:
+            if rows is None:                       # no fancy-index copy of the matrix
+                return _exact(queries, k, np.arange(n_cand), self.dense())
+            cand = np.sort(np.asarray(rows))
+            return _exact(queries, k, cand, self.take(cand))
+
+        mask = None
+        if rows is not None:
+            mask = np.zeros(len(self.rows), dtype=bool)
+            mask[np.asarray(rows)] = True
+        order, bounds = self._lists()
+        out = []
+        for q, cs in zip(queries, queries @ self.centroids.T):
+            probe = _top(cs, self.nprobe)
+            hit = np.concatenate([order[bounds[c]:bounds[c + 1]] for c in probe])
+            if mask is not None:
+                hit = hit[mask[hit]]
+            hit.sort()                             # sequential reads from the memmap
+            s = (self._dense if self._dense is not None else self.vectors)[hit] @ q
+            out.append([(float(s[j]), int(hit[j])) for j in _top(s, k)])
+        return out
+
+    def _lists(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows grouped by IVF list: ``order[bounds[c]:bounds[c+1]]`` is list *c*."""
+        if self._lists_cache is None or len(self._lists_cache[0]) != len(self.assign):
+            order = np.argsort(self.assign, kind="stable")
+            bounds = np.searchsorted(self.assign[order], np.arange(len(self.centroids) + 1))
+            self._lists_cache = (order, bounds)
+        return self._lists_cache
+
+    def picked_rows(self, before: str) -> np.ndarray:
+        return np.array(sorted(i for i, d in self.picked.items() if d < before), dtype=int)
+
+    def _past_picks(self, before: str) -> Tuple[np.ndarray, np.ndarray]:
+        """`picked_rows(before)` and their vectors, kept for the day's dedup
+        and "related" lookups (they all share *before*)."""
+        if self._past is None or self._past[0] != before:
+            rows = self.picked_rows(before)
+            vecs = (self.take(rows) if len(rows)
+                    else np.empty((0, self.dim or 0), dtype=np.float32))
+            self._past = (before, rows, vecs)
+        return self._past[1], self._past[2]
+
+    def duplicates(self, papers: List[Dict], matrix: np.ndarray, before: str,
+                   threshold: float = DUP_THRESHOLD) -> Dict[int, Dict]:
+        """Positions of *papers* already sent (same id or near-identical
+        embedding) in a digest dated before *before* → matching row meta."""
+        past, vecs = self._past_picks(before)
+        if len(past) == 0 or len(papers) == 0:
+            return {}
+        past_set = set(past.tolist())
+        found: Dict[int, Dict] = {}
+        for pos, hits in enumerate(_exact(matrix, 1, past, vecs)):
+            row = self.row_of.get(base_id(papers[pos]["id"]))
+            if row in past_set:
+                found[pos] = dict(self.rows[row], score=1.0)
+            elif hits and hits[0][0] >= threshold:
+                found[pos] = dict(self.rows[hits[0][1]], score=round(hits[0][0], 4))
+        return found
+
+    def related(self, arxiv_id: str, before: str, k: int = RELATED_K,
+                threshold: float = RELATED_THRESHOLD) -> List[Dict]:
+        """Earlier picks most similar to the indexed paper *arxiv_id*."""
+        row = self.row_of.get(base_id(arxiv_id))
+        past, vecs = self._past_picks(before)
+        if row is None or len(past) == 0:
+            return []
+        other = past != row
+        hits = _exact(self.take([row]), k, past[other], vecs[other])[0]
+        return [dict(self.rows[r], score=round(s, 4)) for s, r in hits if s >= threshold]
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────
+def main():
+    ap = argparse.ArgumentParser(description="Inspect the historical paper index.")
+    ap.add_argument("--root", type=pathlib.Path, default=DEFAULT_ROOT,
+                    help="Index root directory (default: %(default)s).")
+    ap.add_argument("--namespace", default=os.getenv("EMBED_MODEL_NAME", DEFAULT_MODEL),
+                    help="Embedding namespace (default: %(default)s).")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("stats", help="Print row / pick counts.")
+    train = sub.add_parser("train", help="Fit IVF centroids for ad-hoc whole-index search.")
+    train.add_argument("--nlist", type=int, default=0,
+                       help="Number of IVF lists (default: √rows).")
+    ns = ap.parse_args()
+
+    index = PaperIndex(ns.root, ns.namespace)
+    if ns.cmd == "train":
+        if ns.nlist < 0:
+            ap.error("--nlist must be 0 or positive")
+        index.train(ns.nlist)
+        index.save()
+    picked = len(index.picked)
+    mode = f"ivf ({len(index.centroids)} lists)" if index.centroids is not None else "flat"
+    print(f"{index.dir}: {len(index)} papers, {picked} picked, dim={index.dim}, {mode}")
+
+
+if __name__ == "__main__":
+    main()